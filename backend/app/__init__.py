@@ -0,0 +1,4 @@
+import time
+
+# Reference point for the import-to-ready startup measurement in app.main
+IMPORT_STARTED_AT = time.perf_counter()
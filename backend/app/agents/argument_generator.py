@@ -19,15 +19,15 @@ class ArgumentGeneratorAgent(BaseAgent):
         if evidence:
             evidence_text = "\n\nEvidence to support your argument:\n"
             for idx, ev in enumerate(evidence, 1):
-                evidence_text += f"{idx}. {ev.get('snippet')} (Source: {ev.get('source')})\n"
+                evidence_text += f"{idx}. {ev.snippet} (Source: {ev.source})\n"
         
         # Build debate history context
         history_text = ""
         if debate_history:
             history_text = "\n\nPrevious debate rounds:\n"
             for h in debate_history[-3:]:  # Last 3 rounds for context
-                history_text += f"Round {h['round']}: User said: {h['user'][:100]}...\n"
-                history_text += f"You responded: {h['ai'][:100]}...\n"
+                history_text += f"Round {h.number}: User said: {h.user[:100]}...\n"
+                history_text += f"You responded: {h.ai[:100]}...\n"
         
         if mode == "roast":
             prompt = f"""You are a witty but respectful debate opponent in ROAST MODE. 
@@ -70,7 +70,7 @@ Create a strong counter-argument that:
 
 Generate your counter-argument (NO JSON, just the argument text):"""
 
-        response = await self.llm.ainvoke(prompt)
+        response = await self._invoke(prompt)
         
         return {
             "counter_argument": response.content.strip(),
@@ -1,18 +1,71 @@
 from abc import ABC, abstractmethod
+from functools import wraps
+from time import perf_counter
 from typing import Any, Dict
-from langchain_groq import ChatGroq
 from app.core.config import settings
+from app.core import metrics, tracing
+from app.core.cassette import get_cassette
+from app.core.circuit_breaker import get_breaker
 
 class BaseAgent(ABC):
+    MODEL_NAME = "llama-3.3-70b-versatile"
+
     def __init__(self):
-        self.llm = ChatGroq(
-            groq_api_key=settings.GROQ_API_KEY,
-            model_name="llama-3.3-70b-versatile",
-            temperature=0.7,
-            max_tokens=2048
+        self._llm = None
+
+    @property
+    def llm(self):
+        """Chat client, created (and langchain imported) on first use"""
+        if self._llm is None:
+            from langchain_groq import ChatGroq
+
+            self._llm = ChatGroq(
+                groq_api_key=settings.GROQ_API_KEY,
+                model_name=self.MODEL_NAME,
+                temperature=0.7,
+                max_tokens=2048
+            )
+        return self._llm
+
+    def __init_subclass__(cls, **kwargs):
+        """Time every concrete execute() without touching the call sites"""
+        super().__init_subclass__(**kwargs)
+        execute = cls.__dict__.get("execute")
+        if execute is None or getattr(execute, "__isabstractmethod__", False):
+            return
+        agent_name = cls.__name__
+
+        @wraps(execute)
+        async def timed_execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+            start = perf_counter()
+            try:
+                return await execute(self, input_data)
+            except Exception:
+                metrics.errors.inc(component=agent_name)
+                raise
+            finally:
+                elapsed = perf_counter() - start
+                metrics.agent_latency.observe(elapsed, agent=agent_name)
+                tracing.record_call(agent_name, elapsed)
+
+        cls.execute = timed_execute
+
+    async def _invoke(self, prompt: str):
+        """Call the LLM and record call/token counters"""
+        agent_name = type(self).__name__
+        metrics.llm_calls.inc(agent=agent_name)
+        response = await get_cassette().llm(
+            self.MODEL_NAME, prompt, lambda: get_breaker("groq").call(lambda: self.llm.ainvoke(prompt))
         )
-    
+        usage = getattr(response, "usage_metadata", None) or {}
+        if usage:
+            input_tokens, output_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+            metrics.llm_tokens.inc(input_tokens, agent=agent_name, kind="input")
+            metrics.llm_tokens.inc(output_tokens, agent=agent_name, kind="output")
+            tracing.record_tokens(agent_name, input_tokens, output_tokens)
+        return response
+
     @abstractmethod
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the agent's main task"""
-        pass
\ No newline at end of file
+        pass
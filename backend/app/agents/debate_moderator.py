@@ -14,9 +14,9 @@ class DebateModeratorAgent(BaseAgent):
         # Build debate summary
         debate_summary = f"Topic: {topic}\n\n"
         for h in debate_history:
-            debate_summary += f"Round {h['round']}:\n"
-            debate_summary += f"User: {h['user'][:150]}...\n"
-            debate_summary += f"AI: {h['ai'][:150]}...\n\n"
+            debate_summary += f"Round {h.number}:\n"
+            debate_summary += f"User: {h.user[:150]}...\n"
+            debate_summary += f"AI: {h.ai[:150]}...\n\n"
         
         prompt = f"""You are a debate moderator. Analyze this debate and provide scores and feedback.
 
@@ -35,7 +35,7 @@ Evaluate and return ONLY valid JSON:
     "final_feedback": "Overall feedback (if debate ending)"
 }}"""
 
-        response = await self.llm.ainvoke(prompt)
+        response = await self._invoke(prompt)
         
         try:
             content = response.content.strip()
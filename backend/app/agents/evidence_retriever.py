@@ -1,42 +1,194 @@
-from typing import Dict, Any, List
+import asyncio
+import logging
+from typing import Dict, Any, FrozenSet, Iterable, List, Sequence
+from time import perf_counter
 from .base_agent import BaseAgent
-from tavily import TavilyClient
 from app.core.config import settings
 from app.models.schemas import Evidence
+from app.core import metrics, tracing
+from app.core.cassette import get_cassette
+from app.core.circuit_breaker import get_breaker
+from app.core.singleflight import SingleFlight
+from app.core.text import bm25_scores, content_words, extract_relevant, jaccard, key_claims, shingles
+
+logger = logging.getLogger(__name__)
+
+# Shared by all retriever instances so identical concurrent searches coalesce
+_search_flight = SingleFlight("evidence_search")
+
+# Topic and claim terms kept per sub-query
+QUERY_TOPIC_TERMS = 4
+QUERY_CLAIM_TERMS = 6
+
+
+def sub_queries(topic: str, claims: Sequence[str], limit: int, stance: str = "") -> List[str]:
+    """Short keyword queries, one per claim, each anchored on the topic's terms.
+
+    `stance` ("for" or "against") leads every query so the results argue
+    that side; content_words() drops it as a stopword, so it is added here.
+    """
+    topic_terms = list(dict.fromkeys(content_words(topic)))[:QUERY_TOPIC_TERMS]
+    lead = [stance] if stance else []
+    queries: List[str] = []
+    for claim in claims:
+        terms = [t for t in dict.fromkeys(content_words(claim)) if t not in topic_terms][:QUERY_CLAIM_TERMS]
+        query = " ".join(lead + topic_terms + terms)
+        if terms and query not in queries:
+            queries.append(query)
+        if len(queries) == limit:
+            break
+    return queries or [" ".join(lead + topic_terms) or topic]
+
+
+def _is_duplicate(text_shingles: FrozenSet, seen: List[FrozenSet]) -> bool:
+    threshold = settings.EVIDENCE_DUPLICATE_SIMILARITY
+    return any(jaccard(text_shingles, other) >= threshold for other in seen)
+
+
+def drop_seen(evidence: List[Evidence], seen_evidence: Iterable[Evidence]) -> List[Evidence]:
+    """Evidence whose URL or text the debate has not cited already"""
+    seen_evidence = list(seen_evidence)
+    seen_urls = {e.url for e in seen_evidence if e.url}
+    seen_text = [shingles(e.snippet) for e in seen_evidence]
+    fresh = []
+    for e in evidence:
+        text_shingles = shingles(e.snippet)
+        if e.url in seen_urls or _is_duplicate(text_shingles, seen_text):
+            continue
+        seen_urls.add(e.url)
+        seen_text.append(text_shingles)
+        fresh.append(e)
+    return fresh
+
 
 class EvidenceRetrieverAgent(BaseAgent):
     def __init__(self):
         super().__init__()
-        self.tavily_client = TavilyClient(api_key=settings.TAVILY_API_KEY)
-    
+        self._tavily_client = None
+
+    @property
+    def tavily_client(self):
+        """Search client, created on first use"""
+        if self._tavily_client is None:
+            from tavily import TavilyClient
+
+            self._tavily_client = TavilyClient(api_key=settings.TAVILY_API_KEY)
+        return self._tavily_client
+
+    async def _search(self, search_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one upstream search off the event loop"""
+
+        async def live_search():
+            return await get_breaker("tavily").call(
+                lambda: asyncio.to_thread(self.tavily_client.search, **search_params)
+            )
+
+        start = perf_counter()
+        try:
+            search_results = await get_cassette().search(search_params, live_search)
+        except Exception:
+            metrics.search_calls.inc(status="error")
+            raise
+        finally:
+            elapsed = perf_counter() - start
+            metrics.search_latency.observe(elapsed)
+            tracing.record_call("search", elapsed)
+        metrics.search_calls.inc(status="ok")
+        return search_results
+
+    async def _search_all(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """Run the sub-queries concurrently; results that arrive by the merge deadline, one per URL"""
+        tasks = []
+        for query in queries:
+            search_params = {
+                "query": query,
+                "search_depth": "advanced",
+                "max_results": max(settings.EVIDENCE_CANDIDATES, settings.EVIDENCE_SOURCES_LIMIT)
+            }
+            flight_key = tuple(sorted(search_params.items()))
+            tasks.append(asyncio.ensure_future(
+                _search_flight.do(flight_key, lambda params=search_params: self._search(params))
+            ))
+        done, late = await asyncio.wait(tasks, timeout=settings.EVIDENCE_MERGE_DEADLINE)
+        for task in late:
+            task.cancel()
+            metrics.evidence_subqueries.inc(result="late")
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        errors = []
+        missing = len(late)
+        for task in done:
+            if task.cancelled():
+                # Its flight was cancelled elsewhere; nothing arrived, as with a late one
+                missing += 1
+                metrics.evidence_subqueries.inc(result="cancelled")
+                continue
+            if task.exception() is not None:
+                errors.append(task.exception())
+                metrics.evidence_subqueries.inc(result="error")
+                continue
+            metrics.evidence_subqueries.inc(result="ok")
+            for result in task.result().get("results", []):
+                key = result.get("url") or result.get("content") or ""
+                kept = merged.get(key)
+                if kept is None or float(result.get("score", 0.5)) > float(kept.get("score", 0.5)):
+                    merged[key] = result
+        if not merged and (errors or missing):
+            # Nothing usable arrived in time
+            raise errors[0] if errors else asyncio.TimeoutError("No evidence search finished before the deadline")
+        if late:
+            logger.info("Evidence merge deadline passed", extra={"late": len(late), "finished": len(done)})
+        return list(merged.values())
+
+    def _select(self, results: List[Dict[str, Any]], query_text: str, seen_evidence: Iterable[Evidence]) -> List[Evidence]:
+        """Rank results by BM25 against the query, drop repeats, keep the relevant sentences"""
+        query_terms = content_words(query_text)
+        contents = [(r.get("content") or "") for r in results]
+        relevance = bm25_scores(query_terms, [content_words(c) for c in contents])
+        # Ties (e.g. no query terms anywhere) fall back to the search engine's order
+        ranked = sorted(
+            zip(results, contents, relevance),
+            key=lambda item: (item[2], float(item[0].get("score", 0.5))),
+            reverse=True
+        )
+
+        query_set = frozenset(query_terms)
+        candidates = [
+            # Fields are normalized here, so skip pydantic validation
+            Evidence.model_construct(
+                source=result.get("title") or "Unknown Source",
+                url=result.get("url") or "",
+                snippet=extract_relevant(content, query_set, settings.EVIDENCE_SNIPPET_CHARS),
+                credibility_score=min(max(float(result.get("score", 0.5)), 0.0), 1.0)
+            )
+            for result, content, _ in ranked
+        ]
+        return drop_seen(candidates, seen_evidence)[:settings.EVIDENCE_SOURCES_LIMIT]
+
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Retrieve evidence for counter-argument"""
-        
+        """Retrieve evidence for counter-argument.
+
+        One short sub-query per key claim (given as `claims`, or taken from
+        the argument) runs concurrently; whatever arrives by the merge
+        deadline is pooled and reranked against the whole argument. An
+        optional `stance` ("for"/"against") is the side the evidence should support.
+        """
+
         topic = input_data.get("topic")
         counter_stance = input_data.get("counter_stance")
-        
+        # Results are ranked against, and trimmed to, what is being argued
+        query_text = input_data.get("query") or counter_stance
+        seen_evidence = input_data.get("seen_evidence", ())
+        claims = input_data.get("claims") or key_claims(query_text, settings.EVIDENCE_SUBQUERIES)
+        stance = input_data.get("stance", "")
+
         # Search for evidence
         try:
-            search_query = f"{topic} {counter_stance} evidence research facts"
-            search_results = self.tavily_client.search(
-                query=search_query,
-                search_depth="advanced",
-                max_results=settings.EVIDENCE_SOURCES_LIMIT
-            )
-            
-            evidence_list = []
-            for result in search_results.get("results", [])[:settings.EVIDENCE_SOURCES_LIMIT]:
-                evidence = Evidence(
-                    source=result.get("title", "Unknown Source"),
-                    url=result.get("url", ""),
-                    snippet=result.get("content", "")[:300],
-                    credibility_score=result.get("score", 0.5)
-                )
-                evidence_list.append(evidence.dict())
-            
-            return {"evidence": evidence_list}
-            
+            results = await self._search_all(sub_queries(topic, claims, settings.EVIDENCE_SUBQUERIES, stance))
+            return {"evidence": self._select(results, query_text, seen_evidence)}
+
         except Exception as e:
-            print(f"Evidence retrieval error: {e}")
-            # Return empty evidence if search fails
-            return {"evidence": []}
\ No newline at end of file
+            logger.warning("Evidence retrieval error: %s", e)
+            metrics.errors.inc(component="evidence_search")
+            # Carry on without evidence; the caller flags the round as degraded
+            return {"evidence": [], "degraded": True}
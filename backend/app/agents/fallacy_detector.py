@@ -33,7 +33,7 @@ Return ONLY valid JSON array, no other text:
 If NO fallacies found, return empty array: []
 """
 
-        response = await self.llm.ainvoke(prompt)
+        response = await self._invoke(prompt)
         
         try:
             content = response.content.strip()
@@ -51,7 +51,7 @@ If NO fallacies found, return empty array: []
                     explanation=f.get("explanation", ""),
                     severity=f.get("severity", "low")
                 )
-                fallacies.append(fallacy.dict())
+                fallacies.append(fallacy)
             
             return {"fallacies": fallacies}
             
@@ -28,7 +28,7 @@ Return ONLY valid JSON, no other text:
     "strength": number
 }}"""
 
-        response = await self.llm.ainvoke(prompt)
+        response = await self._invoke(prompt)
         
         try:
             # Clean response and parse JSON
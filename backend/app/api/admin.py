@@ -0,0 +1,57 @@
+import hmac
+import logging
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from app.api.routes import debate_service
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.services.debate_archive import get_archive
+from app.services.debate_export import ExportFilter, gzip_chunks, iter_debates, ndjson_lines
+from app.services.platform_analytics import platform_analytics
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+def require_admin(x_admin_key: Optional[str]) -> None:
+    """Reject unless the request carries ADMIN_API_KEY (and one is configured)"""
+    expected = settings.ADMIN_API_KEY
+    if not expected or not x_admin_key or not hmac.compare_digest(x_admin_key.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Admin key required")
+
+@router.get("/export")
+def export_debates(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    mode: Optional[str] = None,
+    user_id: Optional[str] = None,
+    format: Literal["ndjson", "gzip"] = "ndjson",
+    x_admin_key: Optional[str] = Header(None)
+):
+    """Stream debates (transcripts, evidence, fallacies, scores) started in [since, until) as NDJSON"""
+    require_admin(x_admin_key)
+    export_filter = ExportFilter(since=since, until=until, mode=mode, user_id=user_id)
+    logger.info("Exporting debates", extra={"since": str(since), "until": str(until), "mode": mode, "user_id": user_id})
+    
+    # Sync generators are iterated in the threadpool, off the event loop
+    lines = ndjson_lines(iter_debates(get_archive(), export_filter, list(debate_service.debates.values())))
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    if format == "gzip":
+        return StreamingResponse(
+            gzip_chunks(lines),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="debates-{stamp}.ndjson.gz"'}
+        )
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="debates-{stamp}.ndjson"'}
+    )
+
+@router.get("/analytics")
+def get_analytics(x_admin_key: Optional[str] = Header(None)):
+    """Popular topics, debate length and duration, win rates and scores by mode, fallacy frequencies"""
+    require_admin(x_admin_key)
+    return FastJSONResponse(platform_analytics.snapshot())
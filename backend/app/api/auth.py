@@ -1,7 +1,11 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Header
 from pydantic import BaseModel, EmailStr
-from app.config.supabase import supabase, supabase_admin
-import traceback
+from app.config.supabase import get_supabase, get_supabase_admin, run_query
+from app.services.profile_cache import profile_cache
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -25,27 +29,30 @@ class AuthResponse(BaseModel):
 async def signup(request: SignupRequest):
     """Sign up a new user"""
     try:
-        print(f"[SIGNUP] Starting signup for: {request.email}")
+        logger.info("Starting signup", extra={"email": request.email})
         
         # Check if username is taken
         try:
-            existing = supabase_admin.table('user_profiles')\
-                .select('username')\
-                .eq('username', request.username)\
-                .execute()
+            existing = await asyncio.to_thread(
+                run_query,
+                get_supabase_admin().table('user_profiles')
+                .select('username')
+                .eq('username', request.username),
+                'user_profiles', 'select'
+            )
             
-            print(f"[SIGNUP] Username check result: {existing}")
+            logger.debug("Username check done", extra={"taken": bool(existing.data)})
             
             if existing.data:
                 raise HTTPException(status_code=400, detail="Username already taken")
         except Exception as e:
-            print(f"[SIGNUP] Error checking username: {e}")
+            logger.warning("Error checking username: %s", e)
             if "already taken" in str(e):
                 raise
         
         # ===== FIX: Use ADMIN client for signup =====
-        print(f"[SIGNUP] Creating auth user with admin client...")
-        auth_response = supabase_admin.auth.admin.create_user({
+        logger.debug("Creating auth user with admin client")
+        auth_response = await asyncio.to_thread(get_supabase_admin().auth.admin.create_user, {
             "email": request.email,
             "password": request.password,
             "email_confirm": True,  # Auto-confirm email
@@ -55,47 +62,66 @@ async def signup(request: SignupRequest):
         })
         
         if not auth_response.user:
-            print(f"[SIGNUP] Auth creation failed")
+            logger.warning("Auth user creation failed", extra={"email": request.email})
             raise HTTPException(status_code=400, detail="Signup failed - could not create user")
         
         user_id = auth_response.user.id
-        print(f"[SIGNUP] Auth user created: {user_id}")
+        logger.debug("Auth user created", extra={"user_id": user_id})
+        
+        # Profile, stats and the first session only need the auth user, so run them together
+        profile_result, stats_result, session_response = await asyncio.gather(
+            asyncio.to_thread(
+                run_query,
+                get_supabase_admin().table('user_profiles').insert({
+                    'id': user_id,
+                    'username': request.username
+                }),
+                'user_profiles', 'insert'
+            ),
+            asyncio.to_thread(
+                run_query,
+                get_supabase_admin().table('user_stats').insert({
+                    'user_id': user_id
+                }),
+                'user_stats', 'insert'
+            ),
+            asyncio.to_thread(get_supabase().auth.sign_in_with_password, {
+                "email": request.email,
+                "password": request.password
+            }),
+            return_exceptions=True
+        )
         
-        # Create profile
-        try:
-            print(f"[SIGNUP] Creating profile for {user_id}...")
-            profile_result = supabase_admin.table('user_profiles').insert({
-                'id': user_id,
-                'username': request.username
-            }).execute()
-            print(f"[SIGNUP] Profile created: {profile_result}")
-        except Exception as e:
-            print(f"[SIGNUP] Profile creation error: {e}")
-            traceback.print_exc()
-            # Rollback: delete the auth user
+        if isinstance(profile_result, Exception):
+            logger.error("Profile creation error: %s", profile_result, extra={"user_id": user_id})
+            # Rollback: rows referencing the auth user go first, then the user itself,
+            # so a failed step never leaves an auth user without a profile behind
+            for table, column in (('user_stats', 'user_id'), ('user_profiles', 'id')):
+                try:
+                    await asyncio.to_thread(
+                        run_query,
+                        get_supabase_admin().table(table).delete().eq(column, user_id),
+                        table, 'delete'
+                    )
+                except Exception:
+                    logger.exception("Signup rollback: deleting %s row failed", table, extra={"user_id": user_id})
+            profile_cache.invalidate(user_id)
             try:
-                supabase_admin.auth.admin.delete_user(user_id)
-            except:
-                pass
-            raise HTTPException(status_code=400, detail=f"Failed to create profile: {str(e)}")
-        
-        # Create stats
-        try:
-            print(f"[SIGNUP] Creating stats for {user_id}...")
-            stats_result = supabase_admin.table('user_stats').insert({
-                'user_id': user_id
-            }).execute()
-            print(f"[SIGNUP] Stats created: {stats_result}")
-        except Exception as e:
-            print(f"[SIGNUP] Stats creation error: {e}")
+                await asyncio.to_thread(get_supabase_admin().auth.admin.delete_user, user_id)
+            except Exception:
+                logger.exception("Signup rollback: deleting auth user failed", extra={"user_id": user_id})
+            raise HTTPException(status_code=400, detail=f"Failed to create profile: {str(profile_result)}")
+        logger.debug("Profile created", extra={"user_id": user_id})
+        profile_cache.set(user_id, request.username)
+        
+        if isinstance(stats_result, Exception):
             # Don't fail signup if stats fail
+            logger.warning("Stats creation error: %s", stats_result, extra={"user_id": user_id})
+        else:
+            logger.debug("Stats created", extra={"user_id": user_id})
         
-        # Generate session for the new user
-        print(f"[SIGNUP] Generating session...")
-        session_response = supabase.auth.sign_in_with_password({
-            "email": request.email,
-            "password": request.password
-        })
+        if isinstance(session_response, Exception):
+            raise session_response
         
         if not session_response.session:
             raise HTTPException(
@@ -103,7 +129,7 @@ async def signup(request: SignupRequest):
                 detail="Account created but login failed. Please try logging in."
             )
         
-        print(f"[SIGNUP] Signup complete for {user_id}")
+        logger.info("Signup complete", extra={"user_id": user_id})
         
         return AuthResponse(
             access_token=session_response.session.access_token,
@@ -116,17 +142,16 @@ async def signup(request: SignupRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[SIGNUP] Unexpected error: {e}")
-        traceback.print_exc()
+        logger.exception("Unexpected signup error")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login", response_model=AuthResponse)
 async def login(request: LoginRequest):
     """Login an existing user"""
     try:
-        print(f"[LOGIN] Attempting login for: {request.email}")
+        logger.debug("Attempting login", extra={"email": request.email})
         
-        auth_response = supabase.auth.sign_in_with_password({
+        auth_response = await asyncio.to_thread(get_supabase().auth.sign_in_with_password, {
             "email": request.email,
             "password": request.password
         })
@@ -135,20 +160,13 @@ async def login(request: LoginRequest):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
         user_id = auth_response.user.id
-        print(f"[LOGIN] User authenticated: {user_id}")
+        logger.info("User authenticated", extra={"user_id": user_id})
         
         # Get username from profile
         try:
-            profile = supabase_admin.table('user_profiles')\
-                .select('username')\
-                .eq('id', user_id)\
-                .single()\
-                .execute()
-            
-            username = profile.data['username']
-            print(f"[LOGIN] Username retrieved: {username}")
+            username = await asyncio.to_thread(profile_cache.get_username, user_id) or "User"
         except Exception as e:
-            print(f"[LOGIN] Error getting username: {e}")
+            logger.warning("Error getting username: %s", e, extra={"user_id": user_id})
             username = "User"  # Fallback
         
         return AuthResponse(
@@ -162,15 +180,14 @@ async def login(request: LoginRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[LOGIN] Error: {e}")
-        traceback.print_exc()
+        logger.warning("Login failed: %s", e)
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @router.post("/logout")
 async def logout():
     """Logout user"""
     try:
-        supabase.auth.sign_out()
+        get_supabase().auth.sign_out()
         return {"message": "Logged out successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -183,22 +200,20 @@ async def get_current_user(authorization: str = Header(None)):
             raise HTTPException(status_code=401, detail="Not authenticated")
         
         token = authorization.split(' ')[1]
-        user = supabase.auth.get_user(token)
+        user = await asyncio.to_thread(get_supabase().auth.get_user, token)
         
         if not user:
             raise HTTPException(status_code=401, detail="Invalid token")
         
         # Get username
-        profile = supabase_admin.table('user_profiles')\
-            .select('username')\
-            .eq('id', user.user.id)\
-            .single()\
-            .execute()
+        username = await asyncio.to_thread(profile_cache.get_username, user.user.id)
+        if username is None:
+            raise HTTPException(status_code=401, detail="Profile not found")
         
         return {
             "user_id": user.user.id,
             "email": user.user.email,
-            "username": profile.data['username']
+            "username": username
         }
         
     except HTTPException:
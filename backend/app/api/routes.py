@@ -1,82 +1,321 @@
-from fastapi import APIRouter, HTTPException, Header
-from app.models.schemas import DebateRequest, DebateResponse
+import hashlib
+import logging
+import math
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from app.models.schemas import DebateList, DebateRequest, DebateResponse
+from app.models.debate import naive_utc
 from app.services import DebateService
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from app.services.gamification_service import gamification_service
+from app.services.leaderboard_windows import WINDOWS
+from app.services.health_service import health_service
+from app.core.circuit_breaker import CircuitOpen
 from app.models.gamification import UserStats, LeaderboardEntry
+from app.core import metrics
+from app.core.config import settings
+from app.core.admission import AdmissionRejected, get_admission, get_rate_limiter
+from app.core.jobs import FAILED, SUCCEEDED, Job, JobQueueFull, get_jobs
+from app.core.idempotency import IdempotencyConflict, get_idempotency_store
+from app.core.singleflight import SingleFlight
+from app.config.supabase import get_supabase
+from app.core.responses import FastJSONResponse
 from typing import List
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 debate_service = DebateService()
+metrics.debates_in_memory.set_function(lambda: len(debate_service.debates))
+metrics.debates_memory_bytes.set_function(lambda: debate_service.memory_usage()["approx_bytes"])
+metrics.deferred_stats.set_function(lambda: len(debate_service.deferred_stats))
+stats_flight = SingleFlight("user_stats")
 
 def get_user_id_from_header(authorization: Optional[str] = None) -> str:
     """Extract user ID from auth header or return guest"""
     if authorization and authorization.startswith('Bearer '):
         try:
-            from app.config.supabase import supabase
             token = authorization.split(' ')[1]
-            user = supabase.auth.get_user(token)
+            user = get_supabase().auth.get_user(token)
             if user and user.user:
                 return user.user.id
         except Exception as e:
-            print(f"[AUTH] Token validation failed: {e}")
+            logger.warning("Token validation failed: %s", e)
     return "guest"
 
+def get_client_ip(request: Request) -> str:
+    """Client IP as seen by the outermost of our TRUSTED_PROXY_COUNT proxies.
+
+    Earlier X-Forwarded-For hops are set by the client and cannot be trusted.
+    """
+    trusted = settings.TRUSTED_PROXY_COUNT
+    forwarded = request.headers.get("x-forwarded-for")
+    if trusted > 0 and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if len(hops) >= trusted:
+            return hops[-trusted]
+    return request.client.host if request.client else "unknown"
+
+def _unavailable(e: CircuitOpen) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+    )
+
+def _too_many_requests(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+    )
+
+def rate_limited(http_request: Request, authorization: Optional[str]) -> str:
+    """Apply the per-IP and per-user rate limits; returns the user ID"""
+    ip = get_client_ip(http_request)
+    if settings.RATE_LIMIT_ENABLED:
+        get_rate_limiter().check_ip(ip)
+    user_id = get_user_id_from_header(authorization)
+    if settings.RATE_LIMIT_ENABLED:
+        get_rate_limiter().check_user(user_id, ip)
+    return user_id
+
+@asynccontextmanager
+async def admitted(http_request: Request, authorization: Optional[str]):
+    """Rate-limit the caller, then hold an admission slot; yields the user ID"""
+    try:
+        user_id = rate_limited(http_request, authorization)
+        async with get_admission().slot(guest=user_id == "guest"):
+            yield user_id
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+
 @router.post("/start-debate", response_model=DebateResponse)
-async def start_debate(request: DebateRequest, authorization: str = Header(None)):
+async def start_debate(request: DebateRequest, http_request: Request, authorization: str = Header(None)):
     """Start a new debate"""
     try:
-        user_id = get_user_id_from_header(authorization)
-        print(f"[DEBATE] Starting debate for user: {user_id}")
-        
-        response = await debate_service.start_debate(
-            topic=request.topic,
-            user_stance=request.user_stance,
-            mode=request.mode,
-            max_rounds=request.max_rounds,
-            user_id=user_id
-        )
-        return response
+        async with admitted(http_request, authorization) as user_id:
+            logger.info("Starting debate", extra={"user_id": user_id})
+            
+            response = await debate_service.start_debate(
+                topic=request.topic,
+                user_stance=request.user_stance,
+                mode=request.mode,
+                max_rounds=request.max_rounds,
+                user_id=user_id
+            )
+        return FastJSONResponse(response)
+    except HTTPException:
+        raise
+    except CircuitOpen as e:
+        raise _unavailable(e)
     except Exception as e:
-        print(f"[DEBATE] Error starting debate: {e}")
+        logger.exception("Error starting debate")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _idempotency_key(debate_id: str, user_argument: str, idempotency_key: str):
+    """Store key and request fingerprint for an Idempotency-Key"""
+    if len(idempotency_key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+    return (debate_id, idempotency_key), hashlib.blake2b(user_argument.encode("utf-8"), digest_size=16).hexdigest()
+
+def _replayed(store: str, debate_id: str, user_argument: str, idempotency_key: Optional[str]):
+    """The earlier request's outcome for a repeated Idempotency-Key, or None if this request must run.
+
+    Checked before rate limiting and admission: a replay starts no work, so
+    a retry is not refused a result that is already there.
+    """
+    if not idempotency_key:
+        return None
+    try:
+        return get_idempotency_store(store).replay(*_idempotency_key(debate_id, user_argument, idempotency_key))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def _idempotent(store: str, debate_id: str, user_argument: str, idempotency_key: Optional[str], fn):
+    """Run `fn` once per Idempotency-Key for this debate; without a key just run it"""
+    if not idempotency_key:
+        return fn()
+    return get_idempotency_store(store).run(*_idempotency_key(debate_id, user_argument, idempotency_key), fn)
+
 @router.post("/continue-debate", response_model=DebateResponse)
-async def continue_debate(request: Dict[str, str], authorization: str = Header(None)):
-    """Continue an existing debate"""
+async def continue_debate(
+    request: Dict[str, str],
+    http_request: Request,
+    authorization: str = Header(None),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Continue an existing debate; retries with the same Idempotency-Key get the first result"""
+    debate_id = request.get("debate_id", "")
+    user_argument = request.get("user_argument", "")
     try:
-        user_id = get_user_id_from_header(authorization)
-        
-        response = await debate_service.continue_debate(
-            debate_id=request.get("debate_id", ""),
-            user_argument=request.get("user_argument", "")
-        )
-        return response
+        replay = _replayed("continue-debate", debate_id, user_argument, idempotency_key)
+        if replay is not None:
+            return FastJSONResponse(await replay)
+        async with admitted(http_request, authorization):
+            response = await _idempotent("continue-debate", debate_id, user_argument, idempotency_key, lambda: debate_service.continue_debate(
+                debate_id=debate_id,
+                user_argument=user_argument
+            ))
+        return FastJSONResponse(response)
+    except HTTPException:
+        raise
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except CircuitOpen as e:
+        raise _unavailable(e)
     except Exception as e:
-        print(f"[DEBATE] Error continuing debate: {e}")
+        logger.exception("Error continuing debate")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _job_error(e: BaseException) -> HTTPException:
+    """The error the synchronous route would have returned"""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, CircuitOpen):
+        return _unavailable(e)
+    return HTTPException(status_code=500, detail=str(e))
+
+def _job_view(job: Job) -> Dict[str, Any]:
+    view: Dict[str, Any] = {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at
+    }
+    if job.status == SUCCEEDED:
+        view["result"] = job.result
+    elif job.status == FAILED:
+        error = _job_error(job.error)
+        view["error"] = {"status_code": error.status_code, "detail": error.detail}
+    return view
+
+async def _submit_job(kind: str, run, http_request: Request, authorization: Optional[str], idempotent=None) -> Response:
+    """Rate-limit the caller and queue `run(user_id)`; responds 202 with the job.
+
+    `idempotent(submit)` may wrap the submission so a retry gets the same job.
+    """
+    try:
+        user_id = rate_limited(http_request, authorization)
+        
+        async def submit() -> Job:
+            return get_jobs().submit(kind, lambda: run(user_id), guest=user_id == "guest")
+        
+        job = await (idempotent(submit) if idempotent else submit())
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+    except JobQueueFull as e:
+        raise _too_many_requests(AdmissionRejected(str(e), settings.ADMISSION_RETRY_AFTER))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    logger.info("Queued job", extra={"job_id": job.id, "kind": kind, "user_id": user_id})
+    return _job_accepted(job, http_request)
+
+def _job_accepted(job: Job, http_request: Request) -> Response:
+    return FastJSONResponse(
+        _job_view(job),
+        status_code=202,
+        headers={"Location": str(http_request.url_for("get_job", job_id=job.id))}
+    )
+
+@router.post("/jobs/start-debate", status_code=202)
+async def submit_start_debate(request: DebateRequest, http_request: Request, authorization: str = Header(None)):
+    """Start a debate in the background; poll /jobs/{job_id} for the first round"""
+    return await _submit_job("start-debate", lambda user_id: debate_service.start_debate(
+        topic=request.topic,
+        user_stance=request.user_stance,
+        mode=request.mode,
+        max_rounds=request.max_rounds,
+        user_id=user_id
+    ), http_request, authorization)
+
+@router.post("/jobs/continue-debate", status_code=202)
+async def submit_continue_debate(
+    request: Dict[str, str],
+    http_request: Request,
+    authorization: str = Header(None),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Play a round in the background; poll /jobs/{job_id} for the response. Retries with the same Idempotency-Key get the same job"""
+    debate_id = request.get("debate_id", "")
+    user_argument = request.get("user_argument", "")
+    replay = _replayed("jobs/continue-debate", debate_id, user_argument, idempotency_key)
+    if replay is not None:
+        return _job_accepted(await replay, http_request)
+    return await _submit_job("continue-debate", lambda user_id: debate_service.continue_debate(
+        debate_id=debate_id,
+        user_argument=user_argument
+    ), http_request, authorization, lambda submit: _idempotent("jobs/continue-debate", debate_id, user_argument, idempotency_key, submit))
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = Query(0, ge=0)):
+    """Job status, with the result or error once finished; `wait` long-polls up to that many seconds"""
+    job = get_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    await job.wait(min(wait, settings.JOB_MAX_WAIT_SECONDS))
+    return FastJSONResponse(_job_view(job))
+
+@router.get("/debates", response_model=DebateList)
+def list_debates(
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    authorization: str = Header(None)
+):
+    """List the signed-in user's debates, newest first; pass `next_before` as `before` for the next page"""
+    user_id = get_user_id_from_header(authorization)
+    if user_id == "guest":
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    try:
+        page = debate_service.list_debates(user_id, limit, before, naive_utc(since), naive_utc(until))
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Unknown `before` cursor")
+    return FastJSONResponse(page)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
 @router.get("/debate/{debate_id}")
-async def get_debate(debate_id: str):
-    """Get debate details"""
-    if debate_id not in debate_service.debates:
+async def get_debate(debate_id: str, since_round: int = 0, if_none_match: Optional[str] = Header(None)):
+    """Get debate details; `since_round` returns only the rounds after it"""
+    debate = await debate_service.load_debate(debate_id)
+    if debate is None:
         raise HTTPException(status_code=404, detail="Debate not found")
-    return debate_service.debates[debate_id]
+    etag = debate.etag()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(debate.to_dict(since_round), headers=headers)
 
 @router.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "DebateMe API"}
+    """Health check endpoint with dependency breaker states and probe results"""
+    return FastJSONResponse(await health_service.report())
 
 @router.get("/stats/{user_id}", response_model=UserStats)
-def get_user_stats(user_id: str):
+async def get_user_stats(user_id: str):
     """Get user statistics and achievements"""
-    stats = gamification_service.get_or_create_stats(user_id)
-    return stats
+    # Several open tabs polling the same user share one Supabase round trip
+    stats = await stats_flight.do(
+        user_id, lambda: run_in_threadpool(gamification_service.get_or_create_stats, user_id)
+    )
+    return FastJSONResponse(stats)
 
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
-def get_leaderboard(limit: int = 10):
-    """Get top players leaderboard"""
-    return gamification_service.get_leaderboard(limit)
\ No newline at end of file
+def get_leaderboard(limit: int = 10, window: str = "all"):
+    """Get top players leaderboard; `window` is all, day, week or month"""
+    if window == "all":
+        return FastJSONResponse(gamification_service.get_leaderboard(limit))
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of: all, {', '.join(WINDOWS)}")
+    return FastJSONResponse(gamification_service.get_windowed_leaderboard(window, limit))
\ No newline at end of file
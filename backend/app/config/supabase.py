@@ -1,15 +1,35 @@
-import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
+from functools import lru_cache
+from time import perf_counter
+from app.core.config import settings
+from app.core import metrics
+from app.core.circuit_breaker import get_breaker
 
-load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+@lru_cache()
+def get_supabase():
+    """Client for regular operations, created on first use"""
+    from supabase import create_client
 
-# Client for regular operations
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 
-# Admin client for service operations
-supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
\ No newline at end of file
+
+@lru_cache()
+def get_supabase_admin():
+    """Admin client for service operations, created on first use"""
+    from supabase import create_client
+
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+
+
+def run_query(query, table: str, op: str):
+    """Execute a PostgREST query builder through the Supabase breaker, recording call count and latency"""
+    start = perf_counter()
+    try:
+        result = get_breaker("supabase").call_sync(query.execute)
+    except Exception:
+        metrics.db_calls.inc(table=table, op=op, status="error")
+        raise
+    finally:
+        metrics.db_latency.observe(perf_counter() - start, table=table, op=op)
+    metrics.db_calls.inc(table=table, op=op, status="ok")
+    return result
@@ -0,0 +1,171 @@
+"""Per-client rate limiting and bounded admission for expensive routes.
+
+Token buckets cap how often a user (or guest IP) can start pipeline work;
+the admission controller caps how many pipelines run at once and queues
+the overflow, serving authenticated users before guests.
+"""
+import asyncio
+import heapq
+import itertools
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from time import monotonic
+from typing import AsyncIterator, List, Tuple
+from app.core.config import settings
+from app.core import metrics
+
+rate_limit_rejections = metrics.counter(
+    "debateme_rate_limit_rejections_total", "Requests rejected by rate limiting or admission", ("reason", "tier")
+)
+admission_active = metrics.gauge("debateme_admission_active", "Pipelines currently admitted")
+admission_queued = metrics.gauge("debateme_admission_queued", "Requests waiting for admission")
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Keyed token buckets refilling at `rate_per_minute` up to `burst`"""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def acquire(self, key: str) -> float:
+        """Take one token; return 0 if allowed, else seconds until one is available"""
+        now = monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [self.burst, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                # Least recently seen keys have long since refilled
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        if self.rate <= 0:
+            return 60.0
+        return (1.0 - bucket[0]) / self.rate
+
+
+class RateLimiter:
+    def __init__(self):
+        self.ip = TokenBucket(settings.RATE_LIMIT_IP_PER_MINUTE, settings.RATE_LIMIT_IP_BURST)
+        self.user = TokenBucket(settings.RATE_LIMIT_USER_PER_MINUTE, settings.RATE_LIMIT_USER_BURST)
+        self.guest = TokenBucket(settings.RATE_LIMIT_GUEST_PER_MINUTE, settings.RATE_LIMIT_GUEST_BURST)
+
+    def check_ip(self, ip: str) -> None:
+        wait = self.ip.acquire(ip)
+        if wait:
+            rate_limit_rejections.inc(reason="ip_rate", tier="any")
+            raise AdmissionRejected("Too many requests from this address", wait)
+
+    def check_user(self, user_id: str, ip: str) -> None:
+        # All guests share the "guest" user ID, so guests are bucketed per IP
+        if user_id == "guest":
+            wait, tier = self.guest.acquire(f"guest:{ip}"), "guest"
+        else:
+            wait, tier = self.user.acquire(user_id), "user"
+        if wait:
+            rate_limit_rejections.inc(reason="user_rate", tier=tier)
+            raise AdmissionRejected("Too many debate requests, slow down", wait)
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded priority queue (authenticated first)"""
+
+    def __init__(self, max_concurrent: int, max_queue: int, guest_max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.guest_max_queue = guest_max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiting = 0
+        self._waiting_guests = 0
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    @asynccontextmanager
+    async def slot(self, guest: bool) -> AsyncIterator[None]:
+        await self._acquire(guest)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, guest: bool) -> None:
+        tier = "guest" if guest else "user"
+        if self._active < self.max_concurrent and not self._waiting:
+            self._active += 1
+            return
+        if self._waiting >= self.max_queue or (guest and self._waiting_guests >= self.guest_max_queue):
+            rate_limit_rejections.inc(reason="queue_full", tier=tier)
+            raise AdmissionRejected("Server is busy, try again shortly", settings.ADMISSION_RETRY_AFTER)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (1 if guest else 0, next(self._seq), future))
+        self._waiting += 1
+        if guest:
+            self._waiting_guests += 1
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            rate_limit_rejections.inc(reason="queue_timeout", tier=tier)
+            raise AdmissionRejected("Server is busy, try again shortly", settings.ADMISSION_RETRY_AFTER)
+        except asyncio.CancelledError:
+            # A slot may have been handed over just before we were cancelled
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        finally:
+            self._waiting -= 1
+            if guest:
+                self._waiting_guests -= 1
+
+    def _release(self) -> None:
+        while self._heap:
+            _, _, future = heapq.heappop(self._heap)
+            if not future.done():
+                # Hand the slot straight to the next waiter
+                future.set_result(None)
+                return
+        self._active -= 1
+
+
+@lru_cache()
+def get_rate_limiter() -> RateLimiter:
+    return RateLimiter()
+
+
+@lru_cache()
+def get_admission() -> AdmissionController:
+    controller = AdmissionController(
+        max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        guest_max_queue=settings.ADMISSION_GUEST_MAX_QUEUE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    )
+    admission_active.set_function(lambda: controller.active)
+    admission_queued.set_function(lambda: controller.waiting)
+    return controller
@@ -0,0 +1,134 @@
+"""Record/replay of LLM and search I/O.
+
+In ``record`` mode every provider call made through the cassette is
+appended to a JSONL file (gzip-compressed when the path ends in ``.gz``).
+In ``replay`` mode those responses are served back without touching the
+network, sleeping for the recorded latency multiplied by
+``IO_REPLAY_LATENCY_SCALE`` (0 disables the sleep).
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+from collections import defaultdict
+from functools import lru_cache
+from threading import Lock
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+
+MODES = ("off", "record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Replay was asked for a request that was never recorded"""
+
+
+def _request_key(kind: str, request: Dict[str, Any]) -> str:
+    raw = json.dumps({"kind": kind, "request": request}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _encode_message(message) -> Dict[str, Any]:
+    return {
+        "content": message.content,
+        "usage": dict(getattr(message, "usage_metadata", None) or {}),
+    }
+
+
+def _decode_message(data: Dict[str, Any]):
+    from langchain_core.messages import AIMessage
+
+    return AIMessage(content=data["content"], usage_metadata=data.get("usage") or None)
+
+
+class Cassette:
+    def __init__(self, mode: str = "off", path: str = "", latency_scale: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode!r} (expected one of {MODES})")
+        self.mode = mode
+        self.path = path
+        self.latency_scale = latency_scale
+        self._lock = Lock()
+        self._entries: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._cursor: Dict[str, int] = defaultdict(int)
+
+    async def llm(self, model: str, prompt: str, call: Callable[[], Awaitable[Any]]):
+        """Run (or replay) a chat completion; `call` performs the live request"""
+        return await self._play(
+            "llm", {"model": model, "prompt": prompt}, call,
+            encode=_encode_message, decode=_decode_message
+        )
+
+    async def search(self, params: Dict[str, Any], call: Callable[[], Awaitable[Any]]):
+        """Run (or replay) an evidence search; `call` performs the live request"""
+        return await self._play("search", params, call)
+
+    async def _play(self, kind, request, call, encode=None, decode=None):
+        if self.mode == "off":
+            return await call()
+
+        key = _request_key(kind, request)
+        if self.mode == "replay":
+            entry = self._next_entry(key, kind)
+            if self.latency_scale > 0:
+                await asyncio.sleep(entry["latency"] * self.latency_scale)
+            return decode(entry["response"]) if decode else entry["response"]
+
+        start = perf_counter()
+        response = await call()
+        latency = perf_counter() - start
+        self._append({
+            "kind": kind,
+            "key": key,
+            "request": request,
+            "response": encode(response) if encode else response,
+            "latency": round(latency, 4),
+        })
+        return response
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with _open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def _next_entry(self, key: str, kind: str) -> Dict[str, Any]:
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            recorded = self._entries.get(key)
+            if not recorded:
+                raise CassetteMiss(f"No recorded {kind} response for key {key} in {self.path}")
+            # Identical requests replay in recorded order, wrapping around
+            index = self._cursor[key] % len(recorded)
+            self._cursor[key] += 1
+            return recorded[index]
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        with _open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry["key"]].append(entry)
+        return entries
+
+
+@lru_cache()
+def get_cassette() -> Cassette:
+    return Cassette(
+        mode=settings.IO_CASSETTE_MODE,
+        path=settings.IO_CASSETTE_PATH,
+        latency_scale=settings.IO_REPLAY_LATENCY_SCALE,
+    )
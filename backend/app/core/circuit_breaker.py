@@ -0,0 +1,150 @@
+"""Per-dependency circuit breakers.
+
+After `failure_threshold` consecutive failures (errors or timeouts) a
+breaker opens and calls fail immediately with `CircuitOpen` instead of
+waiting on a dependency that is down. Once `reset_timeout` has passed one
+trial call is let through (half-open); its outcome closes the breaker or
+opens it for another period.
+"""
+import asyncio
+import threading
+from functools import lru_cache
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+from app.core.config import settings
+from app.core import metrics
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+breaker_state = metrics.gauge("debateme_circuit_state", "Circuit state (0 closed, 1 half-open, 2 open)", ("dependency",))
+breaker_rejections = metrics.counter("debateme_circuit_rejections_total", "Calls failed fast by an open circuit", ("dependency",))
+
+
+class CircuitOpen(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        call_timeout: Optional[float] = None,
+        ignored: Tuple[Type[BaseException], ...] = (),
+    ):
+        """`ignored` errors mean the dependency answered (e.g. a rejected query) and do not count"""
+        self.name = name
+        self.ignored = ignored
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        breaker_state.set(0, dependency=name)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        breaker_state.set(_STATE_VALUES[state], dependency=self.name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected without being attempted"""
+        return self.state == OPEN
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            remaining = self.reset_timeout - (monotonic() - self._opened_at)
+            if self._state == OPEN and remaining <= 0:
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+        breaker_rejections.inc(dependency=self.name)
+        raise CircuitOpen(self.name, max(remaining, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self, error: BaseException) -> None:
+        if isinstance(error, self.ignored):
+            self.record_success()
+            return
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            self._last_error = f"{type(error).__name__}: {error}"[:200]
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = monotonic()
+                self._set_state(OPEN)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        self._acquire()
+        try:
+            if self.call_timeout:
+                result = await asyncio.wait_for(fn(), self.call_timeout)
+            else:
+                result = await fn()
+        except asyncio.CancelledError:
+            with self._lock:
+                self._trial_in_flight = False
+            raise
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def call_sync(self, fn: Callable[[], T]) -> T:
+        self._acquire()
+        try:
+            result = fn()
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._failures, "last_error": self._last_error}
+
+
+@lru_cache()
+def get_breakers() -> Dict[str, CircuitBreaker]:
+    from postgrest.exceptions import APIError
+
+    threshold, reset = settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_SECONDS
+    return {
+        "groq": CircuitBreaker("groq", threshold, reset, settings.LLM_TIMEOUT_SECONDS),
+        "tavily": CircuitBreaker("tavily", threshold, reset, settings.SEARCH_TIMEOUT_SECONDS),
+        "supabase": CircuitBreaker("supabase", threshold, reset, ignored=(APIError,)),
+    }
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    return get_breakers()[name]
@@ -12,11 +12,105 @@ class Settings(BaseSettings):
     # App Settings
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
+    ADMIN_API_KEY: str = ""  # enables /admin endpoints when set (X-Admin-Key header)
     
     # Debate Settings
     MAX_ROUNDS: int = 10
     MAX_ARGUMENT_LENGTH: int = 1000
     EVIDENCE_SOURCES_LIMIT: int = 3
+    EVIDENCE_CANDIDATES: int = 8  # search results ranked locally before keeping the best
+    EVIDENCE_SNIPPET_CHARS: int = 300
+    EVIDENCE_DUPLICATE_SIMILARITY: float = 0.6  # shingle overlap treated as the same text
+    EVIDENCE_SUBQUERIES: int = 3  # concurrent searches, one per key claim
+    EVIDENCE_MERGE_DEADLINE: float = 5.0  # seconds; later sub-queries are cancelled
+    
+    # In-memory debates: rounds older than the last N keep only the preview
+    # the agents read back (0, the default, keeps full text for every round).
+    # Trimmed text is gone for good: GET /debate, the archive and exports see the preview
+    DEBATE_RETAINED_TEXT_ROUNDS: int = 0
+    
+    # Moderator policy: every K rounds, on suspected repetition, and on the last round
+    MODERATOR_EVERY_ROUNDS: int = 3  # 1 moderates every round
+    REPETITION_THRESHOLD: float = 0.5  # MinHash similarity to an earlier round that counts as repeating
+    
+    # Eviction of ended/idle debates to the on-disk archive
+    DEBATE_ARCHIVE_DIR: str = "data/archive"
+    DEBATE_ARCHIVE_SEGMENT_BYTES: int = 64 * 1024 * 1024
+    DEBATE_ENDED_TTL_SECONDS: float = 300  # ended debates stay in memory this long
+    DEBATE_IDLE_TTL_SECONDS: float = 1800  # untouched debates are archived after this
+    DEBATE_EVICTION_INTERVAL_SECONDS: float = 60
+    
+    # Speculative evidence prefetch for key claims
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_MAX_CLAIMS: int = 3
+    PREFETCH_MAX_CONCURRENCY: int = 4
+    PREFETCH_MIN_OVERLAP: float = 0.3  # share of a claim's terms the argument must mention
+    
+    # Topic catalog with precomputed openings
+    TOPIC_CATALOG_ENABLED: bool = True
+    TOPIC_CATALOG_PATH: str = ""  # empty uses the bundled app/data/topic_catalog.json
+    TOPIC_OPENINGS_PATH: str = "data/topic_openings.json"
+    TOPIC_CATALOG_VARIANTS: int = 3
+    TOPIC_PERSONALIZE_THRESHOLD: float = 0.4  # share of user terms the canonical stance must cover
+    
+    # Rate limiting (per minute refill, burst = bucket size)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_USER_PER_MINUTE: float = 10
+    RATE_LIMIT_USER_BURST: int = 5
+    RATE_LIMIT_GUEST_PER_MINUTE: float = 4
+    RATE_LIMIT_GUEST_BURST: int = 2
+    RATE_LIMIT_IP_PER_MINUTE: float = 30
+    RATE_LIMIT_IP_BURST: int = 10
+    TRUSTED_PROXY_COUNT: int = 1  # proxies appending to X-Forwarded-For; 0 ignores the header
+    
+    # Admission control for the debate pipeline
+    ADMISSION_MAX_CONCURRENT: int = 8
+    ADMISSION_MAX_QUEUE: int = 32
+    ADMISSION_GUEST_MAX_QUEUE: int = 8
+    ADMISSION_QUEUE_TIMEOUT: float = 20.0
+    ADMISSION_RETRY_AFTER: float = 5.0
+    
+    # Background jobs for debate rounds (/jobs); workers run outside the admission limit
+    JOB_WORKERS: int = 4
+    JOB_MAX_QUEUED: int = 64
+    JOB_GUEST_MAX_QUEUED: int = 16  # guests can't fill the queue; signed-in jobs also run first
+    JOB_RESULT_TTL_SECONDS: float = 300  # finished jobs can be fetched this long
+    JOB_MAX_WAIT_SECONDS: float = 30  # longest long-poll on GET /jobs/{id}
+    
+    # Idempotency-Key replays for continue-debate
+    IDEMPOTENCY_TTL_SECONDS: float = 600
+    IDEMPOTENCY_MAX_KEYS: int = 10000
+    
+    # Circuit breakers for Groq, Tavily and Supabase
+    BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive failures before failing fast
+    BREAKER_RESET_SECONDS: float = 30  # how long to fail fast before a trial call
+    LLM_TIMEOUT_SECONDS: float = 60
+    SEARCH_TIMEOUT_SECONDS: float = 10
+    HEALTH_PROBE_TTL_SECONDS: float = 30
+    DEFERRED_STATS_RETRY_SECONDS: float = 30
+    DEFERRED_STATS_MAX: int = 10000
+    
+    # Record/replay of LLM and search I/O: off | record | replay
+    IO_CASSETTE_MODE: str = "off"
+    IO_CASSETTE_PATH: str = "cassettes/session.jsonl.gz"
+    IO_REPLAY_LATENCY_SCALE: float = 1.0  # 0 replays without sleeping
+    
+    # Platform analytics
+    ANALYTICS_TOP_TOPICS: int = 20
+    ANALYTICS_TRACKED_TOPICS: int = 1000  # most frequent topics kept; the rest are forgotten
+    
+    # user ID -> username cache
+    PROFILE_CACHE_TTL_SECONDS: float = 300
+    PROFILE_CACHE_MAX_SIZE: int = 10000
+    
+    # Startup
+    STARTUP_PREWARM: bool = True  # create provider clients and open a DB connection at startup
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    LOG_SAMPLE_RATE: float = 1.0  # fraction of low-level records kept
+    LOG_SAMPLE_MAX_LEVEL: str = "DEBUG"  # records at or below this level are sampled
     
     class Config:
         env_file = ".env"
@@ -27,4 +121,9 @@ class Settings(BaseSettings):
 def get_settings():
     return Settings()
 
-settings = get_settings()
\ No newline at end of file
+class _LazySettings:
+    """Defers reading the environment until a setting is first used"""
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+settings = _LazySettings()
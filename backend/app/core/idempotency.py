@@ -0,0 +1,88 @@
+"""Safe client retries with the Idempotency-Key header.
+
+The first request carrying a key starts the work as a task and remembers
+it. A repeat with the same key awaits that task while it runs, or gets its
+result once it has finished, instead of running the pipeline again. The
+task is shielded, so it completes even if the client that started it has
+disconnected, and the retry collects the result. Results are kept for
+IDEMPOTENCY_TTL_SECONDS; failures are forgotten so a retry runs again.
+"""
+import asyncio
+from collections import OrderedDict
+from functools import lru_cache
+from time import monotonic
+from typing import Awaitable, Callable, Hashable, Optional, TypeVar
+from app.core.config import settings
+from app.core import metrics
+
+T = TypeVar("T")
+
+idempotent_replays = metrics.counter(
+    "debateme_idempotent_replays_total", "Requests answered from an earlier request with the same key", ("store", "state")
+)
+
+
+class IdempotencyConflict(Exception):
+    pass
+
+
+class _Entry:
+    __slots__ = ("task", "fingerprint", "expires_at")
+
+    def __init__(self, task: asyncio.Task, fingerprint: str, expires_at: float):
+        self.task = task
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+
+
+class IdempotencyStore:
+    def __init__(self, name: str, ttl: float, max_keys: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_keys = max_keys
+        # Insertion order is expiry order
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+
+    def _expire(self) -> None:
+        now = monotonic()
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires_at > now and len(self._entries) <= self.max_keys:
+                break
+            self._entries.popitem(last=False)
+
+    def replay(self, key: Hashable, fingerprint: str) -> Optional[Awaitable[T]]:
+        """The earlier call made with `key`, running or finished, or None if there is none.
+
+        `fingerprint` identifies the request body; reusing a key for a
+        different request raises IdempotencyConflict.
+        """
+        self._expire()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.fingerprint != fingerprint:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        idempotent_replays.inc(store=self.name, state="stored" if entry.task.done() else "in_flight")
+        # Shielded: the work outlives a caller that disconnects
+        return asyncio.shield(entry.task)
+
+    async def run(self, key: Hashable, fingerprint: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Result of `fn`, or of the earlier call made with `key` (see `replay`)"""
+        earlier = self.replay(key, fingerprint)
+        if earlier is None:
+            entry = _Entry(asyncio.ensure_future(fn()), fingerprint, monotonic() + self.ttl)
+            self._entries[key] = entry
+            entry.task.add_done_callback(lambda task, key=key, entry=entry: self._finished(key, entry))
+            earlier = asyncio.shield(entry.task)
+        return await earlier
+
+    def _finished(self, key: Hashable, entry: _Entry) -> None:
+        if entry.task.cancelled() or entry.task.exception() is not None:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+
+
+@lru_cache()
+def get_idempotency_store(name: str) -> IdempotencyStore:
+    return IdempotencyStore(name, settings.IDEMPOTENCY_TTL_SECONDS, settings.IDEMPOTENCY_MAX_KEYS)
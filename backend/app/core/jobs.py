@@ -0,0 +1,149 @@
+"""Background jobs for debate rounds, so slow pipelines outlive the request.
+
+A submitted job waits in a bounded queue until one of a fixed number of
+workers runs it; clients poll (or long-poll) for the outcome by job ID.
+Signed-in users' jobs are run before guests', and guests may hold only
+JOB_GUEST_MAX_QUEUED of the queued slots.
+Finished jobs are kept for JOB_RESULT_TTL_SECONDS and dropped lazily on
+later submits and lookups. Jobs run in the submitting request's context,
+so their logs keep its request ID.
+"""
+import asyncio
+import contextvars
+import itertools
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+jobs_finished = metrics.counter("debateme_jobs_total", "Background jobs finished", ("kind", "status"))
+jobs_queued = metrics.gauge("debateme_jobs_queued", "Background jobs waiting for a worker")
+job_wait = metrics.histogram("debateme_job_queue_seconds", "Time jobs spent waiting for a worker", ("kind",))
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str, fn: Callable[[], Awaitable[Any]], guest: bool = False):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.guest = guest
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.done = asyncio.Event()
+        self._fn: Optional[Callable[[], Awaitable[Any]]] = fn
+        self._context = contextvars.copy_context()
+        self._queued_at = monotonic()
+
+    async def wait(self, timeout: float) -> None:
+        """Return once the job has finished or `timeout` seconds have passed"""
+        if timeout > 0 and not self.done.is_set():
+            try:
+                await asyncio.wait_for(self.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+class JobManager:
+    def __init__(self, workers: int, max_queued: int, guest_max_queued: int, result_ttl: float):
+        self.workers = workers
+        self.guest_max_queued = guest_max_queued
+        self.result_ttl = result_ttl
+        # (priority, sequence, job): signed-in users first, then submission order
+        self._queue: "asyncio.PriorityQueue[Tuple[int, int, Job]]" = asyncio.PriorityQueue(max_queued)
+        self._seq = itertools.count()
+        self._queued_guests = 0
+        self._jobs: Dict[str, Job] = {}
+        # Finished job IDs with their expiry, oldest first
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+        jobs_queued.set_function(self._queue.qsize)
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued and running jobs are abandoned"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        pending = sum(1 for job in self._jobs.values() if job.status in (QUEUED, RUNNING))
+        if pending:
+            logger.warning("Shutting down with unfinished jobs", extra={"pending": pending})
+
+    def _expire(self) -> None:
+        now = monotonic()
+        while self._expiry:
+            job_id, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            del self._expiry[job_id]
+            self._jobs.pop(job_id, None)
+
+    def submit(self, kind: str, fn: Callable[[], Awaitable[Any]], guest: bool = False) -> Job:
+        """Queue `fn` to run on a worker; raises JobQueueFull when the queue (or the guests' share) is full"""
+        self._expire()
+        if guest and self._queued_guests >= self.guest_max_queued:
+            raise JobQueueFull("Too many queued guest jobs, try again shortly")
+        job = Job(kind, fn, guest)
+        try:
+            self._queue.put_nowait((1 if guest else 0, next(self._seq), job))
+        except asyncio.QueueFull:
+            raise JobQueueFull("Too many queued jobs, try again shortly")
+        if guest:
+            self._queued_guests += 1
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    async def _work(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job = await self._queue.get()
+            if job.guest:
+                self._queued_guests -= 1
+            job.status = RUNNING
+            job_wait.observe(monotonic() - job._queued_at, kind=job.kind)
+            try:
+                job.result = await loop.create_task(job._fn(), context=job._context)
+                job.status = SUCCEEDED
+            except asyncio.CancelledError:
+                job.error = RuntimeError("Server shutting down")
+                job.status = FAILED
+                raise
+            except Exception as e:
+                logger.warning("Job failed: %s", e, extra={"job_id": job.id, "kind": job.kind}, exc_info=True)
+                job.error = e
+                job.status = FAILED
+            finally:
+                job._fn = None
+                job.finished_at = datetime.utcnow()
+                job.done.set()
+                self._expiry[job.id] = monotonic() + self.result_ttl
+                jobs_finished.inc(kind=job.kind, status=job.status)
+                self._queue.task_done()
+
+
+@lru_cache()
+def get_jobs() -> JobManager:
+    return JobManager(
+        settings.JOB_WORKERS, settings.JOB_MAX_QUEUED, settings.JOB_GUEST_MAX_QUEUED, settings.JOB_RESULT_TTL_SECONDS
+    )
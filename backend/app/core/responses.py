@@ -0,0 +1,21 @@
+"""JSON responses rendered with orjson.
+
+Handlers on the hot path return ``FastJSONResponse(model)`` directly, which
+skips FastAPI's ``response_model`` re-validation and its ``jsonable_encoder``
+pass; datetimes and enums are serialized natively by orjson.
+"""
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,61 @@
+"""Coalesce concurrent identical async calls into one upstream call.
+
+The first caller for a key starts the work as a task; callers arriving
+while it is in flight await the same task. Nothing is cached: once the
+task finishes the key is forgotten, so the next call goes upstream again.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from app.core import metrics
+
+T = TypeVar("T")
+
+coalesced_requests = metrics.counter(
+    "debateme_coalesced_requests_total", "Calls served by joining an in-flight identical call", ("flight",)
+)
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task, key=key, call=call: self._forget(key, call))
+        else:
+            coalesced_requests.inc(flight=self.name)
+
+        call.waiters += 1
+        try:
+            # Shield so one waiter being cancelled does not cancel the others
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every waiter gave up; nobody needs the upstream result. Forget
+                # it first so a later caller starts a fresh flight instead of
+                # joining one that is being cancelled
+                self._forget_key(key, call)
+                call.task.cancel()
+
+    def _forget_key(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        self._forget_key(key, call)
+        if not call.task.cancelled():
+            # Mark the exception retrieved even if every waiter was cancelled
+            call.task.exception()
@@ -0,0 +1,141 @@
+"""Small, dependency-free text helpers shared by the debate pipeline."""
+import hashlib
+import math
+import random
+import re
+from collections import Counter
+from typing import FrozenSet, List, Sequence, Tuple
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS: FrozenSet[str] = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers herself him himself his how i if in into is it its itself just
+let me more most my myself no nor not now of off on once only or other our ours ourselves out
+over own same she should so some such than that the their theirs them themselves then there these
+they this those through to too under until up very was we were what when where which while who
+whom why will with would you your yours yourself yourselves i'm it's that's don't doesn't isn't
+think really lot lots much many people thing things way get got make makes
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens"""
+    return _WORD_RE.findall(text.lower())
+
+
+def content_words(text: str) -> List[str]:
+    """Tokens with stopwords and very short words removed"""
+    return [t for t in tokenize(text) if len(t) > 2 and t not in STOPWORDS]
+
+
+def coverage(query: FrozenSet[str], document: FrozenSet[str]) -> float:
+    """Fraction of the query's terms that appear in the document"""
+    if not query:
+        return 0.0
+    return len(query & document) / len(query)
+
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split on sentence-ending punctuation followed by a capitalized start"""
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+_CLAUSE_RE = re.compile(r"\s*[,;:]\s*|\s+(?:but|because|while|whereas|although)\s+", re.IGNORECASE)
+
+
+def key_claims(text: str, count: int) -> List[str]:
+    """Up to `count` distinct claims in the text: its most contentful sentences, or clauses of a long one"""
+    parts = split_sentences(text)
+    if len(parts) < count:
+        parts = [c for s in parts for c in _CLAUSE_RE.split(s) if len(set(content_words(c))) >= 2] or parts
+    ranked = sorted(range(len(parts)), key=lambda i: len(set(content_words(parts[i]))), reverse=True)
+    return [parts[i] for i in sorted(ranked[:count])]
+
+
+def shingles(text: str, size: int = 3) -> FrozenSet[Tuple[str, ...]]:
+    """Word n-grams of the content words, for near-duplicate detection"""
+    words = content_words(text)
+    if len(words) < size:
+        return frozenset([tuple(words)]) if words else frozenset()
+    return frozenset(tuple(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def jaccard(a: FrozenSet, b: FrozenSet) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def bm25_scores(query: Sequence[str], documents: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """Okapi BM25 of each tokenized document against the query terms.
+
+    IDF is taken over `documents` themselves, which is what ranking a
+    handful of search results against each other needs.
+    """
+    if not documents:
+        return []
+    n = len(documents)
+    average_length = sum(len(d) for d in documents) / n or 1.0
+    frequencies = [Counter(d) for d in documents]
+    document_frequency = Counter(t for f in frequencies for t in f)
+    terms = set(query)
+    idf = {t: math.log(1 + (n - document_frequency[t] + 0.5) / (document_frequency[t] + 0.5)) for t in terms}
+    scores = []
+    for doc, freq in zip(documents, frequencies):
+        norm = k1 * (1 - b + b * len(doc) / average_length)
+        scores.append(sum(idf[t] * freq[t] * (k1 + 1) / (freq[t] + norm) for t in terms if freq[t]))
+    return scores
+
+
+def extract_relevant(text: str, query: FrozenSet[str], max_chars: int) -> str:
+    """The sentences most relevant to the query terms, in original order, within `max_chars`"""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    sentences = split_sentences(text)
+    scored = [(len(query & set(content_words(s))), -i, s) for i, s in enumerate(sentences)]
+    if any(score for score, _, _ in scored):
+        scored = [item for item in scored if item[0]]
+    # Otherwise nothing matches and the lead is the best guess at a summary
+    chosen, used = [], 0
+    for score, neg_index, sentence in sorted(scored, reverse=True):
+        cost = len(sentence) + (1 if chosen else 0)
+        if used + cost <= max_chars:
+            chosen.append((-neg_index, sentence))
+            used += cost
+    if not chosen:
+        # Even the best sentence is too long on its own
+        return max(scored)[2][:max_chars]
+    return " ".join(s for _, s in sorted(chosen))
+
+
+_MINHASH_PRIME = (1 << 61) - 1
+_MINHASH_PERMUTATIONS = 32
+_minhash_rng = random.Random(0x5EED)
+_MINHASH_PARAMS = [
+    (_minhash_rng.randrange(1, _MINHASH_PRIME), _minhash_rng.randrange(0, _MINHASH_PRIME))
+    for _ in range(_MINHASH_PERMUTATIONS)
+]
+
+
+def minhash(shingle_set: FrozenSet[Tuple[str, ...]]) -> Tuple[int, ...]:
+    """Fixed-size MinHash signature; matching slots estimate Jaccard similarity"""
+    if not shingle_set:
+        return ()
+    # blake2b rather than hash() so signatures agree across processes
+    hashes = [
+        int.from_bytes(hashlib.blake2b(" ".join(s).encode(), digest_size=8).digest(), "little")
+        for s in shingle_set
+    ]
+    return tuple(min((a * h + b) % _MINHASH_PRIME for h in hashes) for a, b in _MINHASH_PARAMS)
+
+
+def signature_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
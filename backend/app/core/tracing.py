@@ -0,0 +1,58 @@
+"""Per-task stage timings and token counts.
+
+`collect()` installs a StageTrace in the current context; agents and the
+evidence search record into whichever trace is active (tasks spawned
+inside inherit it). Outside `collect()` recording is a no-op.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+class StageTrace:
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def _entry(self, stage: str) -> Dict[str, float]:
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = {"calls": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0}
+        return entry
+
+    def add_call(self, stage: str, seconds: float) -> None:
+        entry = self._entry(stage)
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+
+    def add_tokens(self, stage: str, input_tokens: int, output_tokens: int) -> None:
+        entry = self._entry(stage)
+        entry["input_tokens"] += input_tokens
+        entry["output_tokens"] += output_tokens
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {name: {**values, "seconds": round(values["seconds"], 4)} for name, values in self.stages.items()}
+
+
+_current: ContextVar[Optional[StageTrace]] = ContextVar("stage_trace", default=None)
+
+
+@contextmanager
+def collect() -> Iterator[StageTrace]:
+    trace = StageTrace()
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def record_call(stage: str, seconds: float) -> None:
+    trace = _current.get()
+    if trace is not None:
+        trace.add_call(stage, seconds)
+
+
+def record_tokens(stage: str, input_tokens: int, output_tokens: int) -> None:
+    trace = _current.get()
+    if trace is not None:
+        trace.add_tokens(stage, input_tokens, output_tokens)
@@ -0,0 +1,177 @@
+"""Drive DebateService offline over a JSONL corpus of scripted debates.
+
+Each input line is one debate:
+
+    {"id": "d1", "topic": "...", "user_stance": "...", "mode": "normal",
+     "max_rounds": 5, "turns": ["second user argument", "third ..."]}
+
+Each finished debate is appended to the output as one JSON line with the AI
+replies, scores, per-stage timings and token counts. The output doubles as
+the checkpoint: rerunning with the same output skips IDs already present.
+
+    python -m app.jobs.batch_debates corpus.jsonl results.jsonl --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from time import perf_counter
+from typing import Any, Dict, Iterator, Set
+from app.core import tracing
+from app.core.config import settings
+from app.services.debate_service import DebateService
+
+logger = logging.getLogger(__name__)
+
+
+def completed_ids(output_path: str, retry_errors: bool) -> Set[str]:
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    # A torn last line may end inside a multibyte character
+    with open(output_path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn last line from an interrupted run; that debate reruns
+                continue
+            if retry_errors and result.get("status") != "ok":
+                continue
+            done.add(result["id"])
+    return done
+
+
+def read_scripts(input_path: str, skip: Set[str]) -> Iterator[Dict[str, Any]]:
+    with open(input_path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            script = json.loads(line)
+            script.setdefault("id", str(number))
+            script["id"] = str(script["id"])
+            if script["id"] not in skip:
+                yield script
+
+
+async def run_script(service: DebateService, script: Dict[str, Any]) -> Dict[str, Any]:
+    started = perf_counter()
+    rounds = []
+    debate_id = None
+    with tracing.collect() as trace:
+        try:
+            response = await service.start_debate(
+                topic=script["topic"],
+                user_stance=script["user_stance"],
+                mode=script.get("mode", "normal"),
+                max_rounds=script.get("max_rounds", 5),
+                user_id="guest"  # never touch real user stats
+            )
+            debate_id = response.debate_id
+            rounds.append(response)
+            for turn in script.get("turns", []):
+                if response.is_debate_ended:
+                    break
+                response = await service.continue_debate(debate_id=debate_id, user_argument=turn)
+                rounds.append(response)
+            status, error = "ok", None
+        except Exception as e:
+            logger.exception("Scripted debate failed", extra={"script_id": script["id"]})
+            status, error = "error", f"{type(e).__name__}: {e}"
+        finally:
+            if debate_id is not None:
+                service.prefetcher.cancel(debate_id)
+                service.debates.pop(debate_id, None)
+
+    return {
+        "id": script["id"],
+        "status": status,
+        "error": error,
+        "debate_id": debate_id,
+        "elapsed": round(perf_counter() - started, 4),
+        "stages": trace.as_dict(),
+        "rounds": [
+            {
+                "round": r.round_number,
+                "ai": r.ai_counter_argument,
+                "evidence": len(r.evidence),
+                "fallacies": [f.type.value for f in r.fallacies_detected],
+                "user_score": r.user_score,
+                "ai_score": r.ai_score,
+                "ended": r.is_debate_ended,
+            }
+            for r in rounds
+        ],
+    }
+
+
+def terminate_torn_line(output_path: str) -> None:
+    """End a line torn by an interrupted run so the next result starts cleanly"""
+    # Binary: the torn line may stop partway through a UTF-8 character
+    with open(output_path, "ab+") as f:
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int, retry_errors: bool = False) -> int:
+    # Catalog topics would get canned openings instead of running the prompts being evaluated
+    catalog_enabled, settings.TOPIC_CATALOG_ENABLED = settings.TOPIC_CATALOG_ENABLED, False
+    try:
+        return await _run_batch(input_path, output_path, concurrency, retry_errors)
+    finally:
+        settings.TOPIC_CATALOG_ENABLED = catalog_enabled
+
+
+async def _run_batch(input_path: str, output_path: str, concurrency: int, retry_errors: bool) -> int:
+    service = DebateService()
+    skip = completed_ids(output_path, retry_errors)
+    if skip:
+        logger.info("Resuming: %d debates already in %s", len(skip), output_path)
+
+    queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=concurrency * 2)
+    finished = 0
+
+    terminate_torn_line(output_path)
+    with open(output_path, "a", encoding="utf-8") as out:
+        async def worker() -> None:
+            nonlocal finished
+            while True:
+                script = await queue.get()
+                try:
+                    result = await run_script(service, script)
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    out.flush()
+                    finished += 1
+                    if finished % 100 == 0:
+                        logger.info("Finished %d debates", finished)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            # The bounded queue keeps the corpus streaming rather than loaded
+            for script in read_scripts(input_path, skip):
+                await queue.put(script)
+            await queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    return finished
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run scripted debates through DebateService")
+    parser.add_argument("input", help="JSONL file of debate scripts")
+    parser.add_argument("output", help="JSONL results file (appended; also the resume checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=8, help="debates run at once")
+    parser.add_argument("--retry-errors", action="store_true", help="rerun debates that previously failed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    count = asyncio.run(run_batch(args.input, args.output, args.concurrency, args.retry_errors))
+    logger.info("Done: %d debates written to %s", count, args.output)
@@ -0,0 +1,53 @@
+"""Export archived debates as NDJSON (gzip-compressed if the output ends in .gz).
+
+Reads the on-disk archive directly, so it can run beside or without the
+server; debates still resident in a running worker are exported once
+they are archived (or via GET /api/v1/admin/export).
+
+    python -m app.jobs.export_debates debates.ndjson.gz --since 2025-01-01 --mode roast
+    python -m app.jobs.export_debates - --user-id <uuid> | jq .topic
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime
+from app.services.debate_archive import get_archive
+from app.services.debate_export import ExportFilter, gzip_chunks, iter_debates, ndjson_lines
+
+logger = logging.getLogger(__name__)
+
+
+def export(output: str, export_filter: ExportFilter) -> int:
+    count = 0
+
+    def counted(records):
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    chunks = ndjson_lines(counted(iter_debates(get_archive(), export_filter)))
+    if output.endswith(".gz"):
+        chunks = gzip_chunks(chunks)
+    out = sys.stdout.buffer if output == "-" else open(output, "wb")
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export archived debates as NDJSON")
+    parser.add_argument("output", help="output file ('-' for stdout; .gz compresses)")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="started at or after (UTC, ISO 8601)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="started before (UTC, ISO 8601)")
+    parser.add_argument("--mode", choices=["normal", "roast"])
+    parser.add_argument("--user-id")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", stream=sys.stderr)
+    count = export(args.output, ExportFilter(args.since, args.until, args.mode, args.user_id))
+    logger.info("Exported %d debates to %s", count, args.output)
@@ -0,0 +1,206 @@
+"""Recompute every user's stats, points, levels and achievements from the debate archive.
+
+Run after changing `_calculate_points` or `achievement_definitions`:
+debate outcomes are streamed from the archive index into columnar arrays,
+sorted by user and end time, and counters, streaks and achievement
+conditions are evaluated for all users at once with numpy. Achievement
+conditions are checked after every debate, so an unlock is retroactive if
+the user met it at any point. Existing unlocks are never revoked.
+
+Users whose stored `total_debates` exceeds their archived history played
+debates before the archive existed; they are left alone unless `--force`.
+
+    python -m app.jobs.recompute_stats --dry-run     # print a JSON diff per user
+    python -m app.jobs.recompute_stats --batch-size 500
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+import numpy as np
+from app.config.supabase import get_supabase_admin, run_query
+from app.services.debate_archive import get_archive
+from app.services.gamification_service import GamificationService, gamification_service
+
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = (
+    "total_debates", "debates_won", "debates_lost", "total_rounds", "evidence_cited",
+    "fallacies_caught", "concessions", "current_streak", "longest_streak", "total_points", "level",
+)
+
+
+def load_columns(outcomes: Iterable[Dict[str, Any]]) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """Columnar outcome arrays sorted by user then end time, plus the user IDs by code"""
+    codes: Dict[str, int] = {}
+    rows = {name: [] for name in ("user", "ended_at", "won", "conceded", "rounds", "evidence", "fallacies")}
+    for o in outcomes:
+        rows["user"].append(codes.setdefault(o["user_id"], len(codes)))
+        rows["ended_at"].append(o["ended_at"])
+        # Same rule as DebateService._end_debate: a draw counts as a loss
+        rows["won"].append(o["user_score"] > o["ai_score"])
+        rows["conceded"].append(bool(o.get("conceded")))
+        rows["rounds"].append(o["rounds"])
+        rows["evidence"].append(o["evidence"])
+        rows["fallacies"].append(o["fallacies"])
+
+    columns = {
+        "user": np.array(rows["user"], dtype=np.int64),
+        "ended_at": np.array(rows["ended_at"], dtype="datetime64[us]"),
+        "won": np.array(rows["won"], dtype=bool),
+        "conceded": np.array(rows["conceded"], dtype=bool),
+        "rounds": np.array(rows["rounds"], dtype=np.int64),
+        "evidence": np.array(rows["evidence"], dtype=np.int64),
+        "fallacies": np.array(rows["fallacies"], dtype=np.int64),
+    }
+    order = np.lexsort((columns["ended_at"], columns["user"]))
+    return list(codes), {name: column[order] for name, column in columns.items()}
+
+
+def _segment_cumsum(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Running totals that restart at each user's first debate"""
+    totals = np.cumsum(values)
+    return totals - np.repeat(totals[starts] - values[starts], counts)
+
+
+def compute(service: GamificationService, user_ids: List[str], columns: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+    """Recomputed stat fields and achievement unlock times per user"""
+    n = len(columns["user"])
+    if n == 0:
+        return {}
+    users = columns["user"]
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    ends = starts + counts - 1
+
+    won = columns["won"].astype(np.int64)
+    conceded = (columns["conceded"] & ~columns["won"]).astype(np.int64)
+    running = {
+        "total_debates": _segment_cumsum(np.ones(n, dtype=np.int64), starts, counts),
+        "debates_won": _segment_cumsum(won, starts, counts),
+        "total_rounds": _segment_cumsum(columns["rounds"], starts, counts),
+        "evidence_cited": _segment_cumsum(columns["evidence"], starts, counts),
+        "fallacies_caught": _segment_cumsum(columns["fallacies"], starts, counts),
+        "concessions": _segment_cumsum(conceded, starts, counts),
+    }
+
+    # Win streak after each debate: wins since the last loss or the user's first debate
+    wins_so_far = np.cumsum(won)
+    reset_at = np.where(won == 0, wins_so_far, 0)
+    reset_at[starts] = wins_so_far[starts] - won[starts]
+    running["current_streak"] = wins_so_far - np.maximum.accumulate(reset_at)
+
+    # The points formula stays the single source of truth, applied per debate
+    debate_points = np.vectorize(service._calculate_points, otypes=[np.int64])(
+        columns["won"], columns["rounds"], columns["evidence"], columns["fallacies"]
+    )
+
+    unlocked_at: Dict[str, np.ndarray] = {}
+    for ach_def in service.achievement_definitions:
+        if ach_def["id"] == "perfectionist":
+            met = columns["won"] & (columns["fallacies"] == 0)
+        else:
+            try:
+                met = np.asarray(eval(ach_def["condition"], {"__builtins__": {}}, running), dtype=bool)
+            except Exception as e:
+                logger.warning("Skipping achievement %s: %s", ach_def["id"], e)
+                continue
+        # First debate per user where the condition held, or -1
+        hits = np.flatnonzero(met)
+        first = hits[np.minimum(np.searchsorted(hits, starts), len(hits) - 1)] if len(hits) else np.full(len(starts), -1)
+        unlocked_at[ach_def["id"]] = np.where((first >= starts) & (first <= ends), first, -1)
+
+    points = np.add.reduceat(debate_points, starts)
+    results: Dict[str, Dict[str, Any]] = {}
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        stats = {name: int(values[end]) for name, values in running.items()}
+        stats["debates_lost"] = stats["total_debates"] - stats["debates_won"]
+        stats["longest_streak"] = int(running["current_streak"][start:end + 1].max())
+        stats["debate_points"] = int(points[i])
+        stats["unlocks"] = {
+            ach_id: str(columns["ended_at"][index]) for ach_id, first in unlocked_at.items()
+            if (index := first[i]) >= 0
+        }
+        results[user_ids[users[start]]] = stats
+    return results
+
+
+def _batches(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def fetch_current(user_ids: List[str], batch_size: int) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Set[str]]]:
+    """Stored stats rows and unlocked achievement IDs for these users"""
+    stats: Dict[str, Dict[str, Any]] = {}
+    unlocked: Dict[str, Set[str]] = {}
+    for batch in _batches(user_ids, batch_size):
+        response = run_query(
+            get_supabase_admin().table('user_stats').select('*').in_('user_id', batch),
+            'user_stats', 'select'
+        )
+        stats.update({row['user_id']: row for row in response.data})
+        response = run_query(
+            get_supabase_admin().table('user_achievements').select('user_id, achievement_id').in_('user_id', batch),
+            'user_achievements', 'select'
+        )
+        for row in response.data:
+            unlocked.setdefault(row['user_id'], set()).add(row['achievement_id'])
+    return stats, unlocked
+
+
+def recompute(dry_run: bool, batch_size: int, force: bool = False, out=sys.stdout) -> Dict[str, int]:
+    service = gamification_service
+    user_ids, columns = load_columns(get_archive().outcomes())
+    logger.info("Loaded %d debate outcomes for %d users", len(columns["user"]), len(user_ids))
+    computed = compute(service, user_ids, columns)
+    current, unlocked = fetch_current(list(computed), batch_size)
+    achievement_points = {a["id"]: a["points"] for a in service.achievement_definitions}
+
+    updates: List[Dict[str, Any]] = []
+    new_unlocks: List[Dict[str, Any]] = []
+    skipped = 0
+    now = datetime.utcnow().isoformat()
+    for user_id, stats in computed.items():
+        stored = current.get(user_id, {})
+        if stored.get("total_debates", 0) > stats["total_debates"] and not force:
+            skipped += 1
+            continue
+        have = unlocked.get(user_id, set())
+        gained = {a: t for a, t in stats["unlocks"].items() if a not in have}
+        row = {name: stats[name] for name in STAT_FIELDS if name in stats}
+        row["total_points"] = stats["debate_points"] + sum(achievement_points.get(a, 0) for a in have | set(gained))
+        row["level"] = (row["total_points"] // 500) + 1
+
+        diff = {name: [stored.get(name), value] for name, value in row.items() if stored.get(name) != value}
+        if not diff and not gained:
+            continue
+        if dry_run:
+            out.write(json.dumps({"user_id": user_id, "changes": diff, "unlocks": sorted(gained)}) + "\n")
+        updates.append({"user_id": user_id, **row, "updated_at": now})
+        new_unlocks.extend({"user_id": user_id, "achievement_id": a, "unlocked_at": t} for a, t in gained.items())
+
+    if not dry_run:
+        for batch in _batches(updates, batch_size):
+            run_query(
+                get_supabase_admin().table('user_stats').upsert(batch, on_conflict='user_id', default_to_null=False),
+                'user_stats', 'upsert'
+            )
+        for batch in _batches(new_unlocks, batch_size):
+            run_query(get_supabase_admin().table('user_achievements').insert(batch), 'user_achievements', 'insert')
+
+    return {"users": len(computed), "changed": len(updates), "unlocks": len(new_unlocks), "skipped": skipped}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute user stats and achievements from archived debates")
+    parser.add_argument("--dry-run", action="store_true", help="print a JSON diff per changed user instead of writing")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per bulk read/write")
+    parser.add_argument("--force", action="store_true", help="also rewrite users with debates missing from the archive")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", stream=sys.stderr)
+    summary = recompute(args.dry_run, args.batch_size, args.force)
+    logger.info("Done: %s", summary)
@@ -0,0 +1,31 @@
+"""Warm the topic catalog's precomputed openings.
+
+    python -m app.jobs.warm_topics --variants 3 --concurrency 4
+"""
+import argparse
+import asyncio
+import logging
+from app.core.config import settings
+from app.services.debate_service import DebateService
+from app.services.topic_catalog import topic_catalog
+
+logger = logging.getLogger(__name__)
+
+
+async def main(variants: int, concurrency: int, topics) -> None:
+    openings = await topic_catalog.warm(DebateService(), variants, concurrency, topics)
+    topic_catalog.save_openings(openings)
+    logger.info("Saved %d topics to %s", len(openings), settings.TOPIC_OPENINGS_PATH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute opening counter-arguments for catalog topics")
+    parser.add_argument("--variants", type=int, default=settings.TOPIC_CATALOG_VARIANTS,
+                        help="opening variants per topic, stance and mode")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent LLM/search calls")
+    parser.add_argument("--topic", action="append", dest="topics",
+                        help="only warm this catalog topic (repeatable)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(main(args.variants, args.concurrency, args.topics))
@@ -1,14 +1,88 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from time import perf_counter
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from app import IMPORT_STARTED_AT
 from app.api import router
+from app.api.routes import debate_service
 from app.core.config import settings
 from app.api.auth import router as auth_router
+from app.api.admin import router as admin_router
+from app.core import metrics
+from app.core.jobs import get_jobs
+from app.core.logging_config import configure_logging, request_id_var, shutdown_logging
+from app.config.supabase import get_supabase, get_supabase_admin, run_query
+from app.services.gamification_service import gamification_service
+
+logger = logging.getLogger(__name__)
+
+startup_seconds = metrics.gauge("debateme_startup_seconds", "Time from package import to phase end", ("phase",))
+startup_seconds.set(perf_counter() - IMPORT_STARTED_AT, phase="import")
+
+
+def prewarm():
+    """Create provider clients and open the database connection before traffic"""
+    steps = {
+        "agents": debate_service.warm_up,
+        "supabase": get_supabase,
+        "leaderboards": gamification_service.load_windowed_leaderboard,
+        # One cheap query opens the admin client's HTTP connection
+        "supabase_admin": lambda: run_query(
+            get_supabase_admin().table('user_stats').select('user_id').limit(1), 'user_stats', 'warmup'
+        ),
+    }
+    for name, step in steps.items():
+        start = perf_counter()
+        try:
+            step()
+            logger.info("Pre-warmed %s", name, extra={"seconds": round(perf_counter() - start, 3)})
+        except Exception as e:
+            logger.warning("Pre-warm of %s failed: %s", name, e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging(
+        level=settings.LOG_LEVEL,
+        json_output=settings.LOG_JSON,
+        sample_rate=settings.LOG_SAMPLE_RATE,
+        sample_max_level=settings.LOG_SAMPLE_MAX_LEVEL,
+    )
+    if settings.STARTUP_PREWARM:
+        await asyncio.to_thread(prewarm)
+    # Built once, before traffic; new rounds and debates keep them current after that
+    for name, load in (("platform analytics", debate_service.load_analytics), ("debate index", debate_service.load_debate_index)):
+        try:
+            await asyncio.to_thread(load)
+        except Exception as e:
+            logger.warning("Loading %s failed: %s", name, e)
+    ready = perf_counter() - IMPORT_STARTED_AT
+    startup_seconds.set(ready, phase="ready")
+    logger.info("Startup complete", extra={"import_to_ready_seconds": round(ready, 3)})
+    eviction = asyncio.create_task(debate_service.run_eviction())
+    stats_retry = asyncio.create_task(debate_service.run_deferred_stats())
+    get_jobs().start()
+    yield
+    await get_jobs().stop()
+    eviction.cancel()
+    stats_retry.cancel()
+    if debate_service.deferred_stats:
+        logger.warning("Shutting down with deferred stats updates", extra={"pending": len(debate_service.deferred_stats)})
+    debate_service.shutdown()
+    # Keep every resident debate across the restart
+    await debate_service.archive(list(debate_service.debates))
+    shutdown_logging()
 
 
 app = FastAPI(
     title="DebateMe API",
     description="AI-powered debate platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -20,9 +94,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so /debate/{debate_id} stays one series
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        metrics.http_latency.observe(perf_counter() - start, method=request.method, route=path)
+        metrics.http_requests.inc(method=request.method, route=path, status=str(status))
+        if status >= 500:
+            metrics.errors.inc(component="http")
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Include routes
 app.include_router(router, tags=["debate"],prefix="/api/v1")
 app.include_router(auth_router,prefix="/api/v1",tags=["auth"])
+app.include_router(admin_router,prefix="/api/v1",tags=["admin"])
 
 
 @app.get("/")
@@ -33,6 +136,10 @@ async def root():
         "health": "/api/v1/health"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
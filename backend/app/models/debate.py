@@ -0,0 +1,223 @@
+import hashlib
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from weakref import WeakValueDictionary
+from app.models.schemas import Evidence, Fallacy
+from app.core.text import minhash, shingles, signature_similarity
+
+# Longest slice of a round's text any agent reads back (the moderator's
+# summary); older rounds are trimmed to this when their full text is evicted
+HISTORY_PREVIEW_CHARS = 150
+
+# Identical sources (same URL and snippet) share one Evidence object across
+# every round and debate that cites them, for as long as anything does
+_evidence_interner: "WeakValueDictionary[Tuple[str, str], Evidence]" = WeakValueDictionary()
+
+
+def intern_evidence(item: Union[Evidence, Dict[str, Any]]) -> Evidence:
+    """Return the shared Evidence for this source, creating it if needed"""
+    if isinstance(item, Evidence):
+        url, snippet = item.url, item.snippet
+    else:
+        url, snippet = item.get("url", ""), item.get("snippet", "")
+    key = (sys.intern(url), snippet)
+    shared = _evidence_interner.get(key)
+    if shared is None:
+        if isinstance(item, Evidence):
+            shared = item
+        else:
+            shared = Evidence(**item)
+        shared.url = key[0]
+        shared.source = sys.intern(shared.source)
+        _evidence_interner[key] = shared
+    return shared
+
+
+def text_signature(text: str) -> Tuple[int, ...]:
+    """MinHash of a round's text, for spotting a debate going in circles"""
+    return minhash(shingles(text))
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Debate timestamps are naive UTC; convert an offset-aware bound to match"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _parse_datetime(value: Union[str, datetime, None]) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+@dataclass(slots=True)
+class DebateRound:
+    number: int
+    user: str
+    ai: str
+    user_fallacies: Tuple[Fallacy, ...] = ()
+    evidence: Tuple[Evidence, ...] = ()
+    # Taken from the full text, so they survive trim_text()
+    user_signature: Tuple[int, ...] = ()
+    ai_signature: Tuple[int, ...] = ()
+
+    def trim_text(self) -> None:
+        """Drop text beyond what the agents read back from history"""
+        self.user = self.user[:HISTORY_PREVIEW_CHARS]
+        self.ai = self.ai[:HISTORY_PREVIEW_CHARS]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DebateRound":
+        return cls(
+            number=data["round"],
+            user=data["user"],
+            ai=data["ai"],
+            user_fallacies=tuple(Fallacy(**f) for f in data.get("user_fallacies", [])),
+            evidence=tuple(intern_evidence(e) for e in data.get("evidence", [])),
+            # Older rounds may be trimmed by now; close enough for spotting repeats
+            user_signature=text_signature(data["user"]),
+            ai_signature=text_signature(data["ai"]),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "round": self.number,
+            "user": self.user,
+            "ai": self.ai,
+            "user_fallacies": [f.dict() for f in self.user_fallacies],
+            "evidence": [e.dict() for e in self.evidence],
+        }
+
+
+@dataclass(slots=True)
+class Debate:
+    id: str
+    user_id: str
+    topic: str
+    mode: str
+    max_rounds: int
+    started_at: datetime
+    rounds: List[DebateRound] = field(default_factory=list)
+    user_score: int = 50
+    ai_score: int = 50
+    last_active_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    user_conceded: bool = False
+
+    def add_round(
+        self,
+        number: int,
+        user: str,
+        ai: Optional[str],
+        user_fallacies: Iterable[Union[Fallacy, Dict[str, Any]]] = (),
+        evidence: Iterable[Union[Evidence, Dict[str, Any]]] = (),
+        retained_text_rounds: int = 0,
+        signatures: Optional[Tuple[Tuple[int, ...], Tuple[int, ...]]] = None,
+    ) -> DebateRound:
+        """Append a round; with `retained_text_rounds` > 0 older rounds keep only a preview"""
+        ai = ai or ""
+        if signatures is None:
+            signatures = (text_signature(user), text_signature(ai))
+        debate_round = DebateRound(
+            number=number,
+            user=user,
+            ai=ai,
+            user_fallacies=tuple(f if isinstance(f, Fallacy) else Fallacy(**f) for f in user_fallacies),
+            evidence=tuple(intern_evidence(e) for e in evidence),
+            user_signature=signatures[0],
+            ai_signature=signatures[1],
+        )
+        self.rounds.append(debate_round)
+        self.last_active_at = datetime.utcnow()
+        if retained_text_rounds > 0 and len(self.rounds) > retained_text_rounds:
+            self.rounds[-retained_text_rounds - 1].trim_text()
+        return debate_round
+
+    def repetition(self, user_signature: Tuple[int, ...], ai_signature: Tuple[int, ...]) -> float:
+        """Highest similarity of new text to what the same side already said"""
+        return max(
+            (
+                max(signature_similarity(user_signature, r.user_signature),
+                    signature_similarity(ai_signature, r.ai_signature))
+                for r in self.rounds
+            ),
+            default=0.0,
+        )
+
+    def cited_evidence(self) -> List[Evidence]:
+        return [e for r in self.rounds for e in r.evidence]
+
+    def etag(self) -> str:
+        """Changes whenever a round is added, the scores move or the debate ends"""
+        version = f"{self.id}:{len(self.rounds)}:{self.user_score}:{self.ai_score}:{self.ended_at is not None}"
+        return '"' + hashlib.blake2b(version.encode(), digest_size=8).hexdigest() + '"'
+
+    def to_dict(self, since_round: int = 0) -> Dict[str, Any]:
+        """Serializable view; `since_round` keeps only rounds after that number"""
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "topic": self.topic,
+            "mode": self.mode,
+            "max_rounds": self.max_rounds,
+            "started_at": self.started_at,
+            "rounds": [r.to_dict() for r in self.rounds if r.number > since_round],
+            "user_score": self.user_score,
+            "ai_score": self.ai_score,
+            "last_active_at": self.last_active_at,
+            "ended_at": self.ended_at,
+            "user_conceded": self.user_conceded,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Debate":
+        return cls(
+            id=data["id"],
+            user_id=data["user_id"],
+            topic=data["topic"],
+            mode=data["mode"],
+            max_rounds=data["max_rounds"],
+            started_at=_parse_datetime(data["started_at"]),
+            rounds=[DebateRound.from_dict(r) for r in data.get("rounds", [])],
+            user_score=data.get("user_score", 50),
+            ai_score=data.get("ai_score", 50),
+            last_active_at=_parse_datetime(data.get("last_active_at")),
+            ended_at=_parse_datetime(data.get("ended_at")),
+            user_conceded=data.get("user_conceded", False),
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """Lightweight fields kept in the archive index alongside each record"""
+        return {
+            "user_id": self.user_id,
+            "topic": self.topic,
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "rounds": len(self.rounds),
+            "user_score": self.user_score,
+            "ai_score": self.ai_score,
+            "conceded": self.user_conceded,
+            "evidence": sum(len(r.evidence) for r in self.rounds),
+            "fallacies": sum(len(r.user_fallacies) for r in self.rounds),
+            "fallacy_types": dict(Counter(getattr(f.type, "value", f.type) for r in self.rounds for f in r.user_fallacies)),
+        }
+
+    def approx_size(self) -> int:
+        """Rough bytes held by this debate (shared evidence counted once)"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.rounds) + sys.getsizeof(self.topic)
+        seen = set()
+        for r in self.rounds:
+            size += sys.getsizeof(r) + sys.getsizeof(r.user) + sys.getsizeof(r.ai)
+            size += sys.getsizeof(r.user_fallacies) + sys.getsizeof(r.evidence)
+            for f in r.user_fallacies:
+                size += sys.getsizeof(f) + sys.getsizeof(f.explanation)
+            for e in r.evidence:
+                if id(e) not in seen:
+                    seen.add(id(e))
+                    size += sys.getsizeof(e) + sys.getsizeof(e.snippet) + sys.getsizeof(e.url) + sys.getsizeof(e.source)
+        return size
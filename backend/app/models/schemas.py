@@ -53,6 +53,22 @@ class DebateResponse(BaseModel):
     ai_score: int
     user_score: int
     suggestions: Optional[str] = None
+    degraded: List[str] = []  # pipeline stages skipped because a dependency was unavailable
+
+class DebateListItem(BaseModel):
+    debate_id: str
+    topic: str
+    mode: str
+    started_at: datetime
+    ended_at: Optional[datetime] = None
+    rounds: int
+    user_score: int
+    ai_score: int
+    is_debate_ended: bool
+
+class DebateList(BaseModel):
+    debates: List[DebateListItem]
+    next_before: Optional[str] = None  # pass as `before` for the next page
 
 class DebateSummary(BaseModel):
     debate_id: str
@@ -0,0 +1,144 @@
+"""Append-only, compressed on-disk archive of evicted debates.
+
+Records are zlib-compressed JSON appended to numbered segment files
+(``segment-000001.dat``, ...); a new segment starts once the current one
+passes ``segment_bytes``. Every append also writes one line to
+``index.jsonl`` with the record's segment, offset and length plus the
+debate's summary fields, so reading a debate back is a single seek and
+listing debates never touches the segments. A debate archived again
+(after being restored and evicted) simply gets a newer record; the index
+keeps the last one.
+
+All methods are blocking; call them from a thread on the request path.
+"""
+import json
+import logging
+import os
+import threading
+import zlib
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.jsonl"
+
+archived_debates = metrics.counter("debateme_archived_debates_total", "Debates written to the archive")
+archive_reads = metrics.counter("debateme_archive_reads_total", "Debates loaded from the archive", ("result",))
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+class DebateArchive:
+    def __init__(self, directory: str, segment_bytes: int):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._segment = 0
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.dat")
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Read the offset index on first use (caller holds the lock)"""
+        if self._index is not None:
+            return self._index
+        index: Dict[str, Dict[str, Any]] = {}
+        path = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn last line from a crash; its record is unreachable
+                        continue
+                    index[entry["id"]] = entry
+        self._index = index
+        self._segment = max((e["segment"] for e in index.values()), default=1)
+        return index
+
+    def append(self, debate: Dict[str, Any], summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Write one debate record and index it; returns the index entry"""
+        payload = zlib.compress(json.dumps(debate, default=_json_default).encode("utf-8"))
+        with self._lock:
+            index = self._load_index()
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._segment_path(self._segment)
+            if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+                self._segment += 1
+                path = self._segment_path(self._segment)
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(payload)
+            entry = {
+                "id": debate["id"],
+                "segment": self._segment,
+                "offset": offset,
+                "length": len(payload),
+                "meta": json.loads(json.dumps(summary, default=_json_default)),
+            }
+            with open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            index[entry["id"]] = entry
+        archived_debates.inc()
+        return entry
+
+    def get(self, debate_id: str) -> Optional[Dict[str, Any]]:
+        """Load one archived debate, or None if it was never archived"""
+        with self._lock:
+            entry = self._load_index().get(debate_id)
+        if entry is None:
+            archive_reads.inc(result="miss")
+            return None
+        with open(self._segment_path(entry["segment"]), "rb") as f:
+            f.seek(entry["offset"])
+            payload = f.read(entry["length"])
+        archive_reads.inc(result="hit")
+        return json.loads(zlib.decompress(payload))
+
+    def __contains__(self, debate_id: str) -> bool:
+        with self._lock:
+            return debate_id in self._load_index()
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """Index entries (id, location and summary) of every archived debate"""
+        with self._lock:
+            entries = list(self._load_index().values())
+        return iter(entries)
+
+    def summary(self, debate_id: str) -> Optional[Dict[str, Any]]:
+        """Indexed summary of one archived debate, without reading its record"""
+        with self._lock:
+            entry = self._load_index().get(debate_id)
+        return entry["meta"] if entry is not None else None
+
+    def summaries(self) -> Iterator[Dict[str, Any]]:
+        """Summaries (with IDs) of every archived debate, straight from the index"""
+        for entry in self.entries():
+            yield {"id": entry["id"], **entry["meta"]}
+
+    def outcomes(self) -> Iterator[Dict[str, Any]]:
+        """Summaries (with IDs) of ended, signed-in debates, straight from the index"""
+        for entry in self.entries():
+            meta = entry["meta"]
+            if meta["ended_at"] is None or meta["user_id"] == "guest":
+                continue
+            yield {"id": entry["id"], **meta}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load_index())
+
+
+@lru_cache()
+def get_archive() -> DebateArchive:
+    return DebateArchive(settings.DEBATE_ARCHIVE_DIR, settings.DEBATE_ARCHIVE_SEGMENT_BYTES)
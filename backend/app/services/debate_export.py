@@ -0,0 +1,75 @@
+"""Stream debates out as NDJSON (optionally gzip-compressed) for offline analysis.
+
+Debates are produced one at a time: archived ones are filtered on their
+index summary and only matching records are decompressed, so memory use
+does not grow with the size of the export.
+"""
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+import orjson
+from app.models.debate import Debate, naive_utc
+from app.services.debate_archive import DebateArchive
+
+
+class ExportFilter:
+    def __init__(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        mode: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ):
+        self.since = naive_utc(since)
+        self.until = naive_utc(until)
+        self.mode = mode
+        self.user_id = user_id
+
+    def matches(self, user_id: str, mode: str, started_at: datetime) -> bool:
+        if self.user_id is not None and user_id != self.user_id:
+            return False
+        if self.mode is not None and mode != self.mode:
+            return False
+        if self.since is not None and started_at < self.since:
+            return False
+        if self.until is not None and started_at >= self.until:
+            return False
+        return True
+
+
+def iter_debates(archive: DebateArchive, export_filter: ExportFilter, resident: Iterable[Debate] = ()) -> Iterator[Dict[str, Any]]:
+    """Matching debates as dicts; `resident` (in-memory) copies win over archived ones"""
+    resident_ids = set()
+    for debate in list(resident):
+        resident_ids.add(debate.id)
+        if export_filter.matches(debate.user_id, debate.mode, debate.started_at):
+            yield debate.to_dict()
+    for entry in archive.entries():
+        meta = entry["meta"]
+        if entry["id"] in resident_ids:
+            continue
+        if not export_filter.matches(meta["user_id"], meta["mode"], datetime.fromisoformat(meta["started_at"])):
+            continue
+        record = archive.get(entry["id"])
+        if record is not None:
+            yield record
+
+
+def ndjson_lines(records: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    for record in records:
+        yield orjson.dumps(record, default=lambda model: model.model_dump()) + b"\n"
+
+
+def gzip_chunks(chunks: Iterable[bytes], flush_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally, emitting roughly every `flush_bytes` of input"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending = 0
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_bytes:
+            out += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield compressor.flush()
@@ -0,0 +1,103 @@
+"""Secondary index of debates by user, ordered by start time.
+
+`DebateService.debates` and the archive are keyed by debate ID only; this
+keeps each signed-in user's (started_at, debate_id) pairs in a sorted list
+so a page of "my debates" is a dict lookup plus a bisect, however many
+debates there are in total. Only IDs are indexed: the summaries come from
+the resident debate or the archive index, which already hold them.
+
+The index is built once at startup from the archive index and the
+resident debates; after that debates are added as they start.
+"""
+import logging
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[datetime, str]
+
+
+class DebateIndex:
+    def __init__(self):
+        self._by_user: Dict[str, List[Entry]] = {}
+        self._started: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def add(self, user_id: str, debate_id: str, started_at: datetime) -> None:
+        """Index one debate; guests and debates already indexed are ignored"""
+        if user_id == "guest":
+            return
+        with self._lock:
+            if debate_id in self._started:
+                return
+            self._started[debate_id] = started_at
+            # New debates start now, so this is almost always an append
+            insort(self._by_user.setdefault(user_id, []), (started_at, debate_id))
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, entries: Iterable[Tuple[str, str, datetime]]) -> int:
+        """Build from (user_id, debate_id, started_at) triples once; returns how many were indexed"""
+        if self._loaded:
+            return 0
+        self._loaded = True
+        by_user: Dict[str, List[Entry]] = {}
+        started: Dict[str, datetime] = {}
+        for user_id, debate_id, started_at in entries:
+            if user_id == "guest" or debate_id in started:
+                continue
+            started[debate_id] = started_at
+            by_user.setdefault(user_id, []).append((started_at, debate_id))
+        for user_debates in by_user.values():
+            user_debates.sort()
+        count = len(started)
+        with self._lock:
+            # Debates that started before the load finished are kept
+            for user_id, user_debates in self._by_user.items():
+                fresh = [e for e in user_debates if e[1] not in started]
+                if fresh:
+                    merged = by_user.setdefault(user_id, [])
+                    merged.extend(fresh)
+                    merged.sort()
+            started.update(self._started)
+            self._by_user, self._started = by_user, started
+        logger.info("Loaded debate index", extra={"debates": count, "users": len(by_user)})
+        return count
+
+    def page(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Tuple[List[str], Optional[str]]:
+        """IDs of one page of the user's debates, newest first, and the cursor for the next page.
+
+        `before` is the last debate ID of the previous page; `since`/`until`
+        bound the start time to [since, until).
+        """
+        with self._lock:
+            entries = self._by_user.get(user_id)
+            if not entries:
+                return [], None
+            low = bisect_left(entries, (since,)) if since else 0
+            high = bisect_left(entries, (until,)) if until else len(entries)
+            if before is not None:
+                started_at = self._started.get(before)
+                if started_at is None:
+                    raise KeyError(before)
+                high = min(high, bisect_left(entries, (started_at, before)))
+            start = max(low, high - limit)
+            ids = [debate_id for _, debate_id in reversed(entries[start:high])]
+        return ids, (ids[-1] if ids and start > low else None)
+
+
+# Global instance
+debate_index = DebateIndex()
@@ -1,6 +1,11 @@
-from typing import Dict, Any, List
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Deque, Dict, Any, List, Optional, Tuple
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+from weakref import WeakValueDictionary
+import httpx
 from app.agents import (
     StanceDetectorAgent,
     EvidenceRetrieverAgent,
@@ -8,9 +13,25 @@ from app.agents import (
     ArgumentGeneratorAgent,
     DebateModeratorAgent
 )
-from app.models.schemas import DebateResponse, Evidence, Fallacy
+from app.models.schemas import DebateList, DebateListItem, DebateResponse
+from app.models.debate import Debate, text_signature
 from app.core.config import settings
 from app.services.gamification_service import gamification_service
+from app.core import metrics
+from app.services.evidence_prefetch import EvidencePrefetcher
+from app.services.topic_catalog import topic_catalog
+from app.services.debate_archive import get_archive
+from app.services.platform_analytics import platform_analytics
+from app.services.debate_index import debate_index
+from app.agents.evidence_retriever import drop_seen
+from app.core.circuit_breaker import CircuitOpen, get_breaker
+
+logger = logging.getLogger(__name__)
+
+# Raised before any request reached Supabase, so applying the update later cannot count a debate twice.
+# Other transport errors (timeouts, dropped responses) may follow an applied write and are not retried;
+# failures after the write surface as StatsSaved
+STATS_NOT_WRITTEN = (CircuitOpen, httpx.ConnectError, httpx.ConnectTimeout)
 
 class DebateService:
     def __init__(self):
@@ -19,9 +40,212 @@ class DebateService:
         self.fallacy_detector = FallacyDetectorAgent()
         self.argument_generator = ArgumentGeneratorAgent()
         self.moderator = DebateModeratorAgent()
+        self.prefetcher = EvidencePrefetcher(self.evidence_retriever)
         
         # In-memory storage
-        self.debates: Dict[str, Dict] = {}
+        self.debates: Dict[str, Debate] = {}
+        
+        # One round at a time per debate; a lock lives while anyone holds or awaits it
+        self._round_locks: "WeakValueDictionary[str, asyncio.Lock]" = WeakValueDictionary()
+        
+        # Stats updates held back while Supabase's circuit is open
+        self.deferred_stats: Deque[Dict[str, Any]] = deque()
+    
+    def warm_up(self):
+        """Create every agent's provider clients ahead of the first request"""
+        for agent in (self.stance_detector, self.evidence_retriever, self.fallacy_detector,
+                      self.argument_generator, self.moderator):
+            # The properties create each client on first access
+            _ = agent.llm
+        _ = self.evidence_retriever.tavily_client
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate bytes held by in-memory debates"""
+        total = sum(d.approx_size() for d in list(self.debates.values()))
+        count = len(self.debates)
+        return {
+            "debates": count,
+            "approx_bytes": total,
+            "approx_bytes_per_debate": total // count if count else 0
+        }
+    
+    def load_analytics(self) -> int:
+        """Rebuild platform analytics from the archive and resident debates (first call only)"""
+        if platform_analytics.loaded:
+            return 0
+        return platform_analytics.load(get_archive().summaries(), list(self.debates.values()))
+    
+    def load_debate_index(self) -> int:
+        """Index archived and resident debates by user (first call only)"""
+        if debate_index.loaded:
+            return 0
+        entries = [
+            (e["meta"]["user_id"], e["id"], datetime.fromisoformat(e["meta"]["started_at"]))
+            for e in get_archive().entries()
+        ]
+        entries.extend((d.user_id, d.id, d.started_at) for d in list(self.debates.values()))
+        return debate_index.load(entries)
+    
+    def list_debates(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> DebateList:
+        """One page of a user's debate summaries, newest first"""
+        debate_ids, next_before = debate_index.page(user_id, limit, before, since, until)
+        archive = get_archive()
+        items = []
+        for debate_id in debate_ids:
+            debate = self.debates.get(debate_id)
+            summary = debate.summary() if debate is not None else archive.summary(debate_id)
+            if summary is None:
+                continue
+            items.append(DebateListItem(
+                debate_id=debate_id,
+                topic=summary["topic"],
+                mode=summary["mode"],
+                started_at=summary["started_at"],
+                ended_at=summary["ended_at"],
+                rounds=summary["rounds"],
+                user_score=summary["user_score"],
+                ai_score=summary["ai_score"],
+                is_debate_ended=summary["ended_at"] is not None
+            ))
+        return DebateList(debates=items, next_before=next_before)
+    
+    def shutdown(self):
+        """Cancel background work owned by the service"""
+        self.prefetcher.cancel_all()
+    
+    async def load_debate(self, debate_id: str, restore: bool = False) -> Optional[Debate]:
+        """Find a debate in memory or the archive; `restore` makes an archived one resident again"""
+        debate = self.debates.get(debate_id)
+        if debate is not None:
+            return debate
+        data = await asyncio.to_thread(get_archive().get, debate_id)
+        if data is None:
+            return None
+        debate = Debate.from_dict(data)
+        if restore:
+            # Another request may have restored it while we were reading
+            debate = self.debates.setdefault(debate_id, debate)
+        return debate
+    
+    async def archive(self, debate_ids: List[str]) -> int:
+        """Write debates to the archive and drop them from memory"""
+        evicted = 0
+        for debate_id in debate_ids:
+            lock = self._round_lock(debate_id)
+            if lock.locked():
+                # A round is in flight; a later sweep will get it
+                continue
+            # Rounds wait for the write, then restore the archived copy
+            async with lock:
+                evicted += await self._archive_one(debate_id)
+        return evicted
+    
+    async def _archive_one(self, debate_id: str) -> bool:
+        """Archive and evict one debate (round lock held); True if it was evicted"""
+        debate = self.debates.get(debate_id)
+        if debate is None:
+            return False
+        # Snapshot on the loop; only compression and disk I/O go to a thread
+        touched = debate.last_active_at
+        snapshot = debate.to_dict()
+        try:
+            await asyncio.to_thread(get_archive().append, snapshot, debate.summary())
+        except Exception:
+            logger.exception("Archiving debate failed", extra={"debate_id": debate_id})
+            metrics.errors.inc(component="archive")
+            return False
+        # Touched while writing (e.g. read back by GET): keep it resident, the next sweep rewrites it
+        if debate.last_active_at != touched or self.debates.get(debate_id) is not debate:
+            return False
+        self.prefetcher.cancel(debate_id)
+        del self.debates[debate_id]
+        return True
+    
+    async def evict_expired(self, now: Optional[datetime] = None) -> int:
+        """Archive debates that ended or went idle longer ago than their TTL"""
+        now = now or datetime.utcnow()
+        ended_before = now - timedelta(seconds=settings.DEBATE_ENDED_TTL_SECONDS)
+        idle_before = now - timedelta(seconds=settings.DEBATE_IDLE_TTL_SECONDS)
+        expired = [
+            debate_id for debate_id, debate in list(self.debates.items())
+            if (debate.ended_at is not None and debate.ended_at <= ended_before)
+            or (debate.last_active_at or debate.started_at) <= idle_before
+        ]
+        evicted = await self.archive(expired)
+        if evicted:
+            logger.info("Archived expired debates", extra={"evicted": evicted, "resident": len(self.debates)})
+        return evicted
+    
+    async def run_eviction(self):
+        """Sweep expired debates to the archive until cancelled"""
+        while True:
+            await asyncio.sleep(settings.DEBATE_EVICTION_INTERVAL_SECONDS)
+            try:
+                await self.evict_expired()
+            except Exception:
+                logger.exception("Debate eviction sweep failed")
+                metrics.errors.inc(component="archive")
+    
+    async def _degradable(self, stage: str, call: Awaitable[Dict[str, Any]], fallback: Dict[str, Any], degraded: List[str]) -> Dict[str, Any]:
+        """Run a stage the round can do without; on failure note it in `degraded` and use `fallback`"""
+        try:
+            return await call
+        except Exception as e:
+            logger.warning("Skipping %s: %s", stage, e)
+            degraded.append(stage)
+            return fallback
+    
+    def _defer_stats(self, update: Dict[str, Any]) -> None:
+        if len(self.deferred_stats) >= settings.DEFERRED_STATS_MAX:
+            dropped = self.deferred_stats.popleft()
+            logger.error("Deferred stats queue full; dropping update", extra={"user_id": dropped["user_id"]})
+            metrics.errors.inc(component="gamification")
+        self.deferred_stats.append(update)
+    
+    async def flush_deferred_stats(self) -> int:
+        """Apply held-back stats updates while Supabase stays reachable"""
+        applied = 0
+        while self.deferred_stats and not get_breaker("supabase").is_open:
+            # Left queued until written, so a failed half-open trial loses nothing
+            update = self.deferred_stats[0]
+            try:
+                await asyncio.to_thread(gamification_service.update_stats_after_debate, **update)
+                applied += 1
+            except STATS_NOT_WRITTEN as e:
+                logger.warning("Supabase still unavailable; keeping deferred stats: %s", e, extra={"user_id": update["user_id"]})
+                break
+            except Exception:
+                logger.exception("Deferred stats update failed", extra={"user_id": update["user_id"]})
+                metrics.errors.inc(component="gamification")
+            # A full queue may have dropped it while the write ran
+            if self.deferred_stats and self.deferred_stats[0] is update:
+                self.deferred_stats.popleft()
+        if applied:
+            logger.info("Applied deferred stats updates", extra={"applied": applied, "remaining": len(self.deferred_stats)})
+        return applied
+    
+    async def run_deferred_stats(self):
+        """Retry deferred stats updates until cancelled"""
+        while True:
+            await asyncio.sleep(settings.DEFERRED_STATS_RETRY_SECONDS)
+            await self.flush_deferred_stats()
+    
+    def _moderation_reason(self, debate: Debate, current_round: int, signatures: Tuple[Tuple[int, ...], Tuple[int, ...]]) -> Optional[str]:
+        """Why this round needs the moderator, or None to skip it"""
+        if current_round >= debate.max_rounds:
+            return "final"
+        if debate.repetition(*signatures) >= settings.REPETITION_THRESHOLD:
+            return "repetition"
+        if current_round % max(settings.MODERATOR_EVERY_ROUNDS, 1) == 0:
+            return "interval"
+        return None
     
     def _detect_concession(self, text: str) -> bool:
         """Detect if user is conceding"""
@@ -48,208 +272,289 @@ class DebateService:
         """Start a new debate"""
         
         debate_id = str(uuid.uuid4())
-        
-        # Detect user's stance
-        stance_data = await self.stance_detector.execute({
-            "topic": topic,
-            "user_argument": user_stance
-        })
+        degraded: List[str] = []
+        
+        # Detect user's stance and fallacies in their argument (independent calls)
+        stance_data, fallacy_data = await asyncio.gather(
+            self.stance_detector.execute({
+                "topic": topic,
+                "user_argument": user_stance
+            }),
+            self._degradable("fallacies", self.fallacy_detector.execute({
+                "argument": user_stance
+            }), {"fallacies": []}, degraded)
+        )
         
         # Determine counter stance
         counter_stance = "against" if "for" in stance_data.get("stance", "").lower() else "for"
         
-        # Retrieve evidence for counter-argument
-        evidence_data = await self.evidence_retriever.execute({
-            "topic": topic,
-            "counter_stance": f"{counter_stance} {topic}"
-        })
-        
-        # Generate counter-argument
-        argument_data = await self.argument_generator.execute({
-            "topic": topic,
-            "user_stance": stance_data.get("stance"),
-            "user_argument": user_stance,
-            "evidence": evidence_data.get("evidence", []),
-            "mode": mode,
-            "round_number": 1,
-            "debate_history": []
-        })
-        
-        # Detect fallacies in user's argument
-        fallacy_data = await self.fallacy_detector.execute({
-            "argument": user_stance
-        })
-        
-        # Store debate with user_id
-        self.debates[debate_id] = {
-            "id": debate_id,
-            "user_id": user_id,
-            "topic": topic,
-            "mode": mode,
-            "max_rounds": max_rounds,
-            "started_at": datetime.utcnow(),
-            "rounds": [
-                {
-                    "round": 1,
-                    "user": user_stance,
-                    "ai": argument_data.get("counter_argument"),
-                    "user_fallacies": fallacy_data.get("fallacies", []),
-                    "evidence": evidence_data.get("evidence", [])
-                }
-            ],
-            "user_score": 50,
-            "ai_score": 50
-        }
-        
-        return DebateResponse(
+        # Start searching for the claims the user is likely to argue next
+        self.prefetcher.start(debate_id, topic, counter_stance, stance_data.get("key_claims", []))
+        
+        try:
+            # Popular topics come with precomputed evidence and openings
+            opening = topic_catalog.opening(topic, stance_data.get("stance", ""), mode)
+            
+            if opening is not None:
+                evidence_data = {"evidence": opening["evidence"]}
+            else:
+                # Retrieve evidence for counter-argument
+                evidence_data = await self.evidence_retriever.execute({
+                    "topic": topic,
+                    "counter_stance": f"{counter_stance} {topic}",
+                    "stance": counter_stance,
+                    "query": user_stance,
+                    "claims": stance_data.get("key_claims", [])
+                })
+                if evidence_data.get("degraded"):
+                    degraded.append("evidence")
+            
+            if opening is not None and not topic_catalog.needs_personalizing(opening, user_stance):
+                argument_data = {"counter_argument": opening["counter_argument"]}
+            else:
+                # Generate counter-argument
+                argument_data = await self.argument_generator.execute({
+                    "topic": topic,
+                    "user_stance": stance_data.get("stance"),
+                    "user_argument": user_stance,
+                    "evidence": evidence_data.get("evidence", []),
+                    "mode": mode,
+                    "round_number": 1,
+                    "debate_history": []
+                })
+            
+            # Store debate with user_id
+            debate = Debate(
+                id=debate_id,
+                user_id=user_id,
+                topic=topic,
+                mode=mode,
+                max_rounds=max_rounds,
+                started_at=datetime.utcnow()
+            )
+            first_round = debate.add_round(
+                number=1,
+                user=user_stance,
+                ai=argument_data.get("counter_argument"),
+                user_fallacies=fallacy_data.get("fallacies", []),
+                evidence=evidence_data.get("evidence", []),
+                retained_text_rounds=settings.DEBATE_RETAINED_TEXT_ROUNDS
+            )
+            self.debates[debate_id] = debate
+        except BaseException:
+            # Nothing will ever take these prefetches
+            self.prefetcher.cancel(debate_id)
+            raise
+        debate_index.add(user_id, debate_id, debate.started_at)
+        platform_analytics.record_round(debate, first_round)
+        
+        return DebateResponse.model_construct(
             debate_id=debate_id,
             ai_counter_argument=argument_data.get("counter_argument"),
-            evidence=[Evidence(**e) for e in evidence_data.get("evidence", [])],
-            fallacies_detected=[Fallacy(**f) for f in fallacy_data.get("fallacies", [])],
+            evidence=list(first_round.evidence),
+            fallacies_detected=list(first_round.user_fallacies),
             round_number=1,
             is_debate_ended=False,
             ai_score=50,
             user_score=50,
-            suggestions="Make your next argument stronger with specific evidence!"
+            suggestions="Make your next argument stronger with specific evidence!",
+            degraded=degraded
         )
     
+    def _round_lock(self, debate_id: str) -> asyncio.Lock:
+        lock = self._round_locks.get(debate_id)
+        if lock is None:
+            lock = self._round_locks[debate_id] = asyncio.Lock()
+        return lock
+    
     async def continue_debate(self, debate_id: str, user_argument: str) -> DebateResponse:
-        """Continue an existing debate"""
-        
-        if debate_id not in self.debates:
+        """Continue an existing debate; rounds of the same debate run one after another"""
+        async with self._round_lock(debate_id):
+            return await self._continue_debate(debate_id, user_argument)
+    
+    async def _continue_debate(self, debate_id: str, user_argument: str) -> DebateResponse:
+        debate = await self.load_debate(debate_id, restore=True)
+        if debate is None:
             raise ValueError("Debate not found")
         
-        debate = self.debates[debate_id]
-        current_round = len(debate["rounds"]) + 1
-        max_rounds = debate.get("max_rounds", 10)
+        # Mark it busy so an eviction sweep mid-request keeps it resident
+        debate.last_active_at = datetime.utcnow()
+        current_round = len(debate.rounds) + 1
+        max_rounds = debate.max_rounds
+        degraded: List[str] = []
         
         # Check for concession
         if self._detect_concession(user_argument):
-            debate["rounds"].append({
-                "round": current_round,
-                "user": user_argument,
-                "ai": "You've conceded the point. Excellent debate - knowing when to acknowledge a strong argument is a sign of intellectual maturity.",
-                "user_fallacies": [],
-                "evidence": []
-            })
-            return await self._end_debate(debate_id, user_conceded=True)
+            conceding_round = debate.add_round(
+                number=current_round,
+                user=user_argument,
+                ai="You've conceded the point. Excellent debate - knowing when to acknowledge a strong argument is a sign of intellectual maturity.",
+                retained_text_rounds=settings.DEBATE_RETAINED_TEXT_ROUNDS
+            )
+            platform_analytics.record_round(debate, conceding_round)
+            return await self._end_debate(debate_id, user_conceded=True, degraded=degraded)
         
         # Check if max rounds reached
         if current_round > max_rounds:
-            return await self._end_debate(debate_id)
-        
-        # Retrieve evidence
-        evidence_data = await self.evidence_retriever.execute({
-            "topic": debate["topic"],
-            "counter_stance": user_argument
-        })
+            return await self._end_debate(debate_id, degraded=degraded)
+        
+        # Retrieve evidence, preferring a prefetch for the claim being argued
+        # Sources already cited in this debate are not sent again
+        cited = debate.cited_evidence()
+        prefetched = drop_seen(await self.prefetcher.take(debate_id, user_argument) or [], cited)
+        if prefetched:
+            evidence_data = {"evidence": prefetched}
+        else:
+            evidence_data = await self.evidence_retriever.execute({
+                "topic": debate.topic,
+                "counter_stance": user_argument,
+                "query": user_argument,
+                "seen_evidence": cited
+            })
+            if evidence_data.get("degraded"):
+                degraded.append("evidence")
         
         # Generate counter-argument
         argument_data = await self.argument_generator.execute({
-            "topic": debate["topic"],
+            "topic": debate.topic,
             "user_stance": "counter",
             "user_argument": user_argument,
             "evidence": evidence_data.get("evidence", []),
-            "mode": debate["mode"],
+            "mode": debate.mode,
             "round_number": current_round,
-            "debate_history": debate["rounds"]
+            "debate_history": debate.rounds
         })
         
         # Detect fallacies
-        fallacy_data = await self.fallacy_detector.execute({
+        fallacy_data = await self._degradable("fallacies", self.fallacy_detector.execute({
             "argument": user_argument
-        })
-        
-        # Get moderation
-        moderation = await self.moderator.execute({
-            "topic": debate["topic"],
-            "debate_history": debate["rounds"],
-            "round_number": current_round,
-            "max_rounds": max_rounds
-        })
+        }), {"fallacies": []}, degraded)
+        
+        # Moderate only when there is something to decide; otherwise the scores stand
+        signatures = (text_signature(user_argument), text_signature(argument_data.get("counter_argument") or ""))
+        reason = self._moderation_reason(debate, current_round, signatures)
+        metrics.moderator_decisions.inc(reason=reason or "skipped")
+        if reason and reason != "final":
+            # Without moderation the scores stand and the debate goes on
+            moderation = await self._degradable("moderation", self.moderator.execute({
+                "topic": debate.topic,
+                "debate_history": debate.rounds,
+                "round_number": current_round,
+                "max_rounds": max_rounds
+            }), {"user_score": debate.user_score, "ai_score": debate.ai_score}, degraded)
+        else:
+            # A final round is moderated once, by _end_debate, with the round included
+            moderation = {"user_score": debate.user_score, "ai_score": debate.ai_score}
         
         # Update scores
-        debate["user_score"] = moderation.get("user_score", 50)
-        debate["ai_score"] = moderation.get("ai_score", 50)
+        debate.user_score = moderation.get("user_score", 50)
+        debate.ai_score = moderation.get("ai_score", 50)
         
         # Add new round
-        debate["rounds"].append({
-            "round": current_round,
-            "user": user_argument,
-            "ai": argument_data.get("counter_argument"),
-            "user_fallacies": fallacy_data.get("fallacies", []),
-            "evidence": evidence_data.get("evidence", [])
-        })
+        new_round = debate.add_round(
+            number=current_round,
+            user=user_argument,
+            ai=argument_data.get("counter_argument"),
+            user_fallacies=fallacy_data.get("fallacies", []),
+            evidence=evidence_data.get("evidence", []),
+            retained_text_rounds=settings.DEBATE_RETAINED_TEXT_ROUNDS,
+            signatures=signatures
+        )
+        platform_analytics.record_round(debate, new_round)
         
         # Check if debate should end
+        if reason == "final":
+            return await self._end_debate(debate_id, degraded=degraded)
         if moderation.get("should_end"):
-            return await self._end_debate(debate_id)
+            return await self._end_debate(debate_id, degraded=degraded, moderation=moderation)
         
-        return DebateResponse(
+        return DebateResponse.model_construct(
             debate_id=debate_id,
             ai_counter_argument=argument_data.get("counter_argument"),
-            evidence=[Evidence(**e) for e in evidence_data.get("evidence", [])],
-            fallacies_detected=[Fallacy(**f) for f in fallacy_data.get("fallacies", [])],
+            evidence=list(new_round.evidence),
+            fallacies_detected=list(new_round.user_fallacies),
             round_number=current_round,
             is_debate_ended=False,
-            ai_score=debate["ai_score"],
-            user_score=debate["user_score"],
-            suggestions=moderation.get("suggestions")
+            ai_score=debate.ai_score,
+            user_score=debate.user_score,
+            suggestions=moderation.get("suggestions"),
+            degraded=degraded
         )
     
-    async def _end_debate(self, debate_id: str, user_conceded: bool = False) -> DebateResponse:
-        """End debate and provide summary"""
+    async def _end_debate(self, debate_id: str, user_conceded: bool = False, degraded: Optional[List[str]] = None, moderation: Optional[Dict[str, Any]] = None) -> DebateResponse:
+        """End debate and provide summary; `moderation` is a verdict already given this round, if any"""
         
         debate = self.debates[debate_id]
-        
-        moderation = await self.moderator.execute({
-            "topic": debate["topic"],
-            "debate_history": debate["rounds"],
-            "round_number": len(debate["rounds"]),
-            "max_rounds": debate.get("max_rounds", 10)
-        })
+        self.prefetcher.cancel(debate_id)
+        degraded = degraded if degraded is not None else []
+        
+        if moderation is None:
+            moderation = await self._degradable("moderation", self.moderator.execute({
+                "topic": debate.topic,
+                "debate_history": debate.rounds,
+                "round_number": len(debate.rounds),
+                "max_rounds": debate.max_rounds
+            }), {}, degraded)
+        
+        # Continuing a finished debate ends it again; count its outcome once
+        first_end = debate.ended_at is None
+        debate.ended_at = datetime.utcnow()
+        debate.user_conceded = user_conceded
+        debate.user_score = moderation.get("user_score", debate.user_score)
+        debate.ai_score = moderation.get("ai_score", debate.ai_score)
+        if first_end:
+            platform_analytics.record_end(debate)
         
         # Get user_id from debate
-        user_id = debate.get("user_id", "guest")
+        user_id = debate.user_id
         
         # Only update stats if logged in (not guest)
         if user_id != "guest":
-            try:
-                print(f"[GAMIFICATION] Updating stats for logged-in user: {user_id}")
-                
-                user_won = moderation.get("user_score", 50) > moderation.get("ai_score", 50)
-                evidence_count = sum(len(r.get("evidence", [])) for r in debate["rounds"])
-                fallacy_count = sum(len(r.get("user_fallacies", [])) for r in debate["rounds"])
-                
-                gamification_service.update_stats_after_debate(
-                    user_id=user_id,
-                    won=user_won,
-                    rounds=len(debate["rounds"]),
-                    evidence_count=evidence_count,
-                    fallacy_count=fallacy_count,
-                    conceded=user_conceded
-                )
-                print(f"[GAMIFICATION] ✅ Stats updated successfully!")
-            except Exception as e:
-                print(f"[ERROR] Gamification failed: {e}")
-                import traceback
-                traceback.print_exc()
+            stats_update = {
+                "user_id": user_id,
+                "won": debate.user_score > debate.ai_score,
+                "rounds": len(debate.rounds),
+                "evidence_count": sum(len(r.evidence) for r in debate.rounds),
+                "fallacy_count": sum(len(r.user_fallacies) for r in debate.rounds),
+                "conceded": user_conceded,
+                "debate_id": debate_id,
+                # A deferred update still counts on the day the debate ended
+                "ended_at": debate.ended_at
+            }
+            if get_breaker("supabase").is_open:
+                # Nothing was written, so the update can safely be applied later
+                logger.warning("Supabase unavailable; deferring stats", extra={"user_id": user_id, "debate_id": debate_id})
+                self._defer_stats(stats_update)
+                degraded.append("stats")
+            else:
+                try:
+                    logger.debug("Updating stats for logged-in user", extra={"user_id": user_id})
+                    await asyncio.to_thread(gamification_service.update_stats_after_debate, **stats_update)
+                    logger.info("Stats updated", extra={"user_id": user_id, "debate_id": debate_id})
+                except STATS_NOT_WRITTEN as e:
+                    logger.warning("Supabase unavailable; deferring stats: %s", e, extra={"user_id": user_id, "debate_id": debate_id})
+                    self._defer_stats(stats_update)
+                    degraded.append("stats")
+                except Exception:
+                    logger.exception("Gamification failed", extra={"user_id": user_id, "debate_id": debate_id})
+                    metrics.errors.inc(component="gamification")
         else:
-            print(f"[GAMIFICATION] Skipping stats for guest user")
+            logger.debug("Skipping stats for guest user", extra={"debate_id": debate_id})
         
         if user_conceded:
             feedback = "You conceded, showing intellectual honesty. Great debate!"
         else:
             feedback = moderation.get('final_feedback', 'You argued well!')
         
-        return DebateResponse(
+        return DebateResponse.model_construct(
             debate_id=debate_id,
             ai_counter_argument=f"Debate concluded. {feedback}",
             evidence=[],
             fallacies_detected=[],
-            round_number=len(debate["rounds"]),
+            round_number=len(debate.rounds),
             is_debate_ended=True,
-            ai_score=moderation.get("ai_score", debate.get("ai_score", 50)),
-            user_score=moderation.get("user_score", debate.get("user_score", 50)),
-            suggestions=feedback
+            ai_score=debate.ai_score,
+            user_score=debate.user_score,
+            suggestions=feedback,
+            degraded=degraded
         )
\ No newline at end of file
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from app.agents import EvidenceRetrieverAgent
+from app.core import metrics
+from app.core.config import settings
+from app.core.text import content_words, coverage
+from app.models.schemas import Evidence
+
+logger = logging.getLogger(__name__)
+
+
+class _Prefetch:
+    __slots__ = ("terms", "task")
+
+    def __init__(self, terms: frozenset, task: asyncio.Task):
+        self.terms = terms
+        self.task = task
+
+
+class EvidencePrefetcher:
+    """Speculatively fetch evidence for a debate's key claims in the background.
+
+    The claims extracted on round 1 are what the user is most likely to
+    argue next, so their evidence searches are started early and parked
+    per debate. A later round takes the prefetch whose claim best matches
+    the new argument instead of waiting on a fresh search.
+    """
+
+    def __init__(self, retriever: EvidenceRetrieverAgent):
+        self.retriever = retriever
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._prefetches: Dict[str, List[_Prefetch]] = {}
+
+    def start(self, debate_id: str, topic: str, counter_stance: str, key_claims: List[str]) -> None:
+        """Kick off background searches for the first few key claims"""
+        if not settings.PREFETCH_ENABLED:
+            return
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.PREFETCH_MAX_CONCURRENCY)
+        pending = self._prefetches.setdefault(debate_id, [])
+        for claim in key_claims[:settings.PREFETCH_MAX_CLAIMS]:
+            terms = frozenset(content_words(claim))
+            if not terms:
+                continue
+            task = asyncio.create_task(self._fetch(topic, counter_stance, claim))
+            pending.append(_Prefetch(terms, task))
+
+    async def _fetch(self, topic: str, counter_stance: str, claim: str) -> List[Evidence]:
+        # Exactly one sub-query: the claim is not split again
+        async with self._semaphore:
+            evidence_data = await self.retriever.execute({
+                "topic": topic,
+                "stance": counter_stance,
+                "claims": [claim],
+                "query": claim
+            })
+        return evidence_data.get("evidence", [])
+
+    async def take(self, debate_id: str, user_argument: str) -> Optional[List[Evidence]]:
+        """Evidence prefetched for the claim closest to `user_argument`, if any matches"""
+        pending = self._prefetches.get(debate_id)
+        if not pending:
+            return None
+
+        argument_terms = frozenset(content_words(user_argument))
+        best = max(pending, key=lambda p: coverage(p.terms, argument_terms))
+        if coverage(best.terms, argument_terms) < settings.PREFETCH_MIN_OVERLAP:
+            metrics.record_cache("evidence_prefetch", hit=False)
+            return None
+
+        # Each prefetch is used once so later rounds don't repeat its sources
+        pending.remove(best)
+        try:
+            evidence = await best.task
+        except Exception as e:
+            logger.warning("Evidence prefetch failed: %s", e, extra={"debate_id": debate_id})
+            evidence = []
+
+        metrics.record_cache("evidence_prefetch", hit=bool(evidence))
+        return evidence or None
+
+    def cancel(self, debate_id: str) -> None:
+        """Drop a finished debate's prefetches, cancelling any still running"""
+        for prefetch in self._prefetches.pop(debate_id, []):
+            prefetch.task.cancel()
+
+    def cancel_all(self) -> None:
+        for debate_id in list(self._prefetches):
+            self.cancel(debate_id)
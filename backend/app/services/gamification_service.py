@@ -1,7 +1,16 @@
+import logging
 from typing import Dict, List, Optional
 from datetime import datetime
 from app.models.gamification import Achievement, UserStats, LeaderboardEntry
-from app.config.supabase import supabase_admin
+from app.config.supabase import get_supabase_admin, run_query
+from app.services.debate_archive import get_archive
+from app.services.leaderboard_windows import windowed_leaderboard
+from app.services.profile_cache import profile_cache
+
+logger = logging.getLogger(__name__)
+
+class StatsSaved(Exception):
+    """The user_stats row was written but a later step failed, so the update must not be retried"""
 
 class GamificationService:
     def __init__(self):
@@ -77,7 +86,10 @@ class GamificationService:
         """Get user stats from Supabase or create if not exists"""
         try:
             # Get stats from database
-            response = supabase_admin.table('user_stats').select('*').eq('user_id', user_id).execute()
+            response = run_query(
+                get_supabase_admin().table('user_stats').select('*').eq('user_id', user_id),
+                'user_stats', 'select'
+            )
             
             if not response.data:
                 # Create default stats
@@ -96,16 +108,18 @@ class GamificationService:
                     'total_points': 0,
                     'level': 1
                 }
-                supabase_admin.table('user_stats').insert(new_stats).execute()
+                run_query(get_supabase_admin().table('user_stats').insert(new_stats), 'user_stats', 'insert')
                 stats_data = new_stats
             else:
                 stats_data = response.data[0]
             
             # Get user's unlocked achievements
-            achievements_response = supabase_admin.table('user_achievements')\
-                .select('achievement_id, unlocked_at')\
-                .eq('user_id', user_id)\
-                .execute()
+            achievements_response = run_query(
+                get_supabase_admin().table('user_achievements')
+                .select('achievement_id, unlocked_at')
+                .eq('user_id', user_id),
+                'user_achievements', 'select'
+            )
             
             unlocked_ids = {a['achievement_id']: a['unlocked_at'] for a in achievements_response.data}
             
@@ -141,7 +155,7 @@ class GamificationService:
             )
             
         except Exception as e:
-            print(f"Error getting stats: {e}")
+            logger.error("Error getting stats: %s", e, extra={"user_id": user_id})
             raise
     
     def update_stats_after_debate(
@@ -151,12 +165,16 @@ class GamificationService:
         rounds: int, 
         evidence_count: int,
         fallacy_count: int,
-        conceded: bool
+        conceded: bool,
+        debate_id: Optional[str] = None,
+        ended_at: Optional[datetime] = None
     ) -> UserStats:
         """Update user stats after a debate - SAVES TO DATABASE"""
         
-        print(f"[GAMIFICATION] Updating stats for user: {user_id}")
-        print(f"[GAMIFICATION] Won: {won}, Rounds: {rounds}, Evidence: {evidence_count}, Fallacies: {fallacy_count}, Conceded: {conceded}")
+        logger.debug("Updating stats after debate", extra={
+            "user_id": user_id, "won": won, "rounds": rounds,
+            "evidence_count": evidence_count, "fallacy_count": fallacy_count, "conceded": conceded
+        })
         
         stats = self.get_or_create_stats(user_id)
         
@@ -190,10 +208,13 @@ class GamificationService:
         new_total_points = stats.total_points + points_earned
         new_level = (new_total_points // 500) + 1
         
-        print(f"[GAMIFICATION] New stats - Debates: {new_total_debates}, Won: {new_debates_won}, Concessions: {new_concessions}, Points: {new_total_points}")
+        logger.debug("New stats computed", extra={
+            "user_id": user_id, "total_debates": new_total_debates, "debates_won": new_debates_won,
+            "concessions": new_concessions, "total_points": new_total_points
+        })
         
         # Update in database
-        supabase_admin.table('user_stats').update({
+        run_query(get_supabase_admin().table('user_stats').update({
             'total_debates': new_total_debates,
             'debates_won': new_debates_won,
             'debates_lost': new_debates_lost,
@@ -206,23 +227,27 @@ class GamificationService:
             'total_points': new_total_points,
             'level': new_level,
             'updated_at': datetime.utcnow().isoformat()
-        }).eq('user_id', user_id).execute()
-        
-        print(f"[GAMIFICATION] Stats saved to database!")
+        }).eq('user_id', user_id), 'user_stats', 'update')
         
-        # Check achievements
-        self._check_and_unlock_achievements(user_id, {
-            'total_debates': new_total_debates,
-            'debates_won': new_debates_won,
-            'total_rounds': new_total_rounds,
-            'evidence_cited': new_evidence_cited,
-            'fallacies_caught': new_fallacies_caught,
-            'concessions': new_concessions,
-            'current_streak': new_current_streak,
-            'perfect_game': fallacy_count == 0 and won
-        })
-        
-        return self.get_or_create_stats(user_id)
+        logger.debug("Stats saved", extra={"user_id": user_id})
+        try:
+            windowed_leaderboard.add(user_id, debate_id, points_earned, won, ended_at)
+            
+            # Check achievements
+            self._check_and_unlock_achievements(user_id, {
+                'total_debates': new_total_debates,
+                'debates_won': new_debates_won,
+                'total_rounds': new_total_rounds,
+                'evidence_cited': new_evidence_cited,
+                'fallacies_caught': new_fallacies_caught,
+                'concessions': new_concessions,
+                'current_streak': new_current_streak,
+                'perfect_game': fallacy_count == 0 and won
+            })
+            
+            return self.get_or_create_stats(user_id)
+        except Exception as e:
+            raise StatsSaved(f"Stats saved but follow-up failed: {e}") from e
     
     def _calculate_points(self, won: bool, rounds: int, evidence_count: int, fallacy_count: int) -> int:
         """Calculate points earned"""
@@ -242,13 +267,15 @@ class GamificationService:
     def _check_and_unlock_achievements(self, user_id: str, stats: dict):
         """Check and unlock achievements - SAVES TO DATABASE"""
         
-        print(f"[GAMIFICATION] Checking achievements for user: {user_id}")
+        logger.debug("Checking achievements", extra={"user_id": user_id})
         
         # Get currently unlocked achievements
-        unlocked_response = supabase_admin.table('user_achievements')\
-            .select('achievement_id')\
-            .eq('user_id', user_id)\
-            .execute()
+        unlocked_response = run_query(
+            get_supabase_admin().table('user_achievements')
+            .select('achievement_id')
+            .eq('user_id', user_id),
+            'user_achievements', 'select'
+        )
         
         unlocked_ids = {a['achievement_id'] for a in unlocked_response.data}
         
@@ -268,60 +295,62 @@ class GamificationService:
                     pass
             
             if should_unlock:
-                print(f"[GAMIFICATION] 🎉 Unlocking achievement: {ach_def['name']}")
+                logger.info("Unlocking achievement", extra={"user_id": user_id, "achievement_id": ach_def['id']})
                 
                 # Unlock achievement in database
-                supabase_admin.table('user_achievements').insert({
+                run_query(get_supabase_admin().table('user_achievements').insert({
                     'user_id': user_id,
                     'achievement_id': ach_def['id'],
                     'unlocked_at': datetime.utcnow().isoformat()
-                }).execute()
+                }), 'user_achievements', 'insert')
                 
                 # Add points to user stats
-                current_stats = supabase_admin.table('user_stats')\
-                    .select('total_points')\
-                    .eq('user_id', user_id)\
-                    .single()\
-                    .execute()
+                current_stats = run_query(
+                    get_supabase_admin().table('user_stats')
+                    .select('total_points')
+                    .eq('user_id', user_id)
+                    .single(),
+                    'user_stats', 'select'
+                )
                 
                 new_points = current_stats.data['total_points'] + ach_def['points']
                 new_level = (new_points // 500) + 1
                 
-                supabase_admin.table('user_stats').update({
+                run_query(get_supabase_admin().table('user_stats').update({
                     'total_points': new_points,
                     'level': new_level
-                }).eq('user_id', user_id).execute()
+                }).eq('user_id', user_id), 'user_stats', 'update')
                 
-                print(f"[GAMIFICATION] Achievement unlocked! +{ach_def['points']} points")
+                logger.debug("Achievement points awarded", extra={"user_id": user_id, "points": ach_def['points']})
     
     def get_leaderboard(self, limit: int = 10) -> List[LeaderboardEntry]:
         """Get top players from database"""
         try:
-            response = supabase_admin.table('user_stats')\
-                .select('user_id, total_points, debates_won, level')\
-                .order('total_points', desc=True)\
-                .limit(limit)\
-                .execute()
+            response = run_query(
+                get_supabase_admin().table('user_stats')
+                .select('user_id, total_points, debates_won, level')
+                .order('total_points', desc=True)
+                .limit(limit),
+                'user_stats', 'select'
+            )
+            
+            usernames = profile_cache.get_usernames(entry['user_id'] for entry in response.data)
             
             leaderboard = []
             for idx, entry in enumerate(response.data):
-                # Get username
-                profile = supabase_admin.table('user_profiles')\
-                    .select('username')\
-                    .eq('id', entry['user_id'])\
-                    .single()\
-                    .execute()
                 
                 # Get achievement count
-                ach_response = supabase_admin.table('user_achievements')\
-                    .select('achievement_id', count='exact')\
-                    .eq('user_id', entry['user_id'])\
-                    .execute()
+                ach_response = run_query(
+                    get_supabase_admin().table('user_achievements')
+                    .select('achievement_id', count='exact')
+                    .eq('user_id', entry['user_id']),
+                    'user_achievements', 'select'
+                )
                 
                 leaderboard.append(LeaderboardEntry(
                     rank=idx + 1,
                     user_id=entry['user_id'],
-                    username=profile.data['username'],
+                    username=usernames.get(entry['user_id'], "unknown"),
                     total_points=entry['total_points'],
                     debates_won=entry['debates_won'],
                     level=entry['level'],
@@ -331,8 +360,51 @@ class GamificationService:
             return leaderboard
             
         except Exception as e:
-            print(f"Error getting leaderboard: {e}")
+            logger.error("Error getting leaderboard: %s", e)
             return []
+    
+    def load_windowed_leaderboard(self) -> int:
+        """Rebuild the rolling leaderboards from archived debates (first call only)"""
+        return windowed_leaderboard.load(get_archive().outcomes(), self._calculate_points)
+    
+    def get_windowed_leaderboard(self, window: str, limit: int = 10) -> List[LeaderboardEntry]:
+        """Top players by points earned in the last day/week/month"""
+        self.load_windowed_leaderboard()
+        top = windowed_leaderboard.top(window, limit)
+        if not top:
+            return []
+        user_ids = [user_id for user_id, _, _ in top]
+        try:
+            usernames = profile_cache.get_usernames(user_ids)
+            levels = run_query(
+                get_supabase_admin().table('user_stats').select('user_id, level').in_('user_id', user_ids),
+                'user_stats', 'select'
+            )
+            achievements = run_query(
+                get_supabase_admin().table('user_achievements').select('user_id').in_('user_id', user_ids),
+                'user_achievements', 'select'
+            )
+        except Exception as e:
+            logger.error("Error getting leaderboard: %s", e, extra={"window": window})
+            return []
+        
+        level_by_user = {s['user_id']: s['level'] for s in levels.data}
+        achievement_counts: Dict[str, int] = {}
+        for a in achievements.data:
+            achievement_counts[a['user_id']] = achievement_counts.get(a['user_id'], 0) + 1
+        
+        return [
+            LeaderboardEntry(
+                rank=idx + 1,
+                user_id=user_id,
+                username=usernames.get(user_id, "unknown"),
+                total_points=points,
+                debates_won=wins,
+                level=level_by_user.get(user_id, 1),
+                achievements_count=achievement_counts.get(user_id, 0)
+            )
+            for idx, (user_id, points, wins) in enumerate(top)
+        ]
 
 # Global instance
 gamification_service = GamificationService()
\ No newline at end of file
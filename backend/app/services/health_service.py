@@ -0,0 +1,64 @@
+"""Dependency health for /health: breaker states plus cached probes.
+
+Supabase gets a live probe (one indexed single-row select), cached for
+HEALTH_PROBE_TTL_SECONDS and coalesced so frequent health checks cost at
+most one query per period. Groq and Tavily bill per call, so they are
+reported from their circuit breakers, which already see every real call.
+"""
+import asyncio
+from datetime import datetime
+from time import monotonic, perf_counter
+from typing import Any, Callable, Dict, Tuple
+from app.config.supabase import get_supabase_admin, run_query
+from app.core.circuit_breaker import OPEN, get_breakers
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+
+def _probe_supabase() -> None:
+    run_query(get_supabase_admin().table('user_stats').select('user_id').limit(1), 'user_stats', 'health')
+
+
+class HealthService:
+    def __init__(self):
+        self.probes: Dict[str, Callable[[], None]] = {"supabase": _probe_supabase}
+        self._results: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._flight = SingleFlight("health_probe")
+
+    async def _run_probe(self, name: str) -> Dict[str, Any]:
+        start = perf_counter()
+        try:
+            await asyncio.to_thread(self.probes[name])
+            result = {"ok": True, "error": None}
+        except Exception as e:
+            result = {"ok": False, "error": f"{type(e).__name__}: {e}"[:200]}
+        result["latency_ms"] = round((perf_counter() - start) * 1000, 1)
+        result["checked_at"] = datetime.utcnow().isoformat()
+        self._results[name] = (monotonic(), result)
+        return result
+
+    async def probe(self, name: str) -> Dict[str, Any]:
+        cached = self._results.get(name)
+        if cached and monotonic() - cached[0] < settings.HEALTH_PROBE_TTL_SECONDS:
+            return cached[1]
+        return await self._flight.do(name, lambda: self._run_probe(name))
+
+    async def report(self) -> Dict[str, Any]:
+        dependencies: Dict[str, Dict[str, Any]] = {
+            name: {"breaker": breaker.snapshot()} for name, breaker in get_breakers().items()
+        }
+        for name in self.probes:
+            dependencies[name]["probe"] = await self.probe(name)
+        healthy = all(
+            d["breaker"]["state"] != OPEN and d.get("probe", {}).get("ok", True)
+            for d in dependencies.values()
+        )
+        return {
+            "status": "healthy" if healthy else "degraded",
+            "service": "DebateMe API",
+            "dependencies": dependencies
+        }
+
+
+# Global instance
+health_service = HealthService()
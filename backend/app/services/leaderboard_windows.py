@@ -0,0 +1,130 @@
+"""Rolling daily/weekly/monthly leaderboards from per-day point buckets.
+
+Every finished debate adds its points (and win) to the user's bucket for
+that UTC day and to a running total per window. When the day rolls over,
+buckets leaving a window are subtracted from its totals, and buckets older
+than the longest window are dropped, so a window's top-N is a heap pass
+over the users active in that window rather than a scan of debates.
+
+Only debate points count; achievement bonuses stay in lifetime points.
+Live debates are added as they end; on first use the buckets are rebuilt
+from the debate archive (debate IDs dedupe the two sources).
+"""
+import heapq
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = {"day": 1, "week": 7, "month": 30}
+
+# [points, wins]
+Totals = List[int]
+
+
+class WindowedLeaderboard:
+    def __init__(self, windows: Dict[str, int] = WINDOWS):
+        self.windows = dict(windows)
+        self._retained_days = max(self.windows.values())
+        self._buckets: Dict[date, Dict[str, Totals]] = {}
+        self._debates: Dict[date, Set[str]] = {}
+        self._totals: Dict[str, Dict[str, Totals]] = {name: {} for name in self.windows}
+        self._today: Optional[date] = None
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _in_window(self, day: date, days: int) -> bool:
+        return self._today - timedelta(days=days) < day <= self._today
+
+    def _advance(self, today: date) -> None:
+        """Roll windows forward to `today`, subtracting and compacting expired buckets (lock held)"""
+        if self._today is None:
+            self._today = today
+            return
+        if today <= self._today:
+            return
+        previous, self._today = self._today, today
+        for name, days in self.windows.items():
+            totals = self._totals[name]
+            for day, bucket in self._buckets.items():
+                if previous - timedelta(days=days) < day <= today - timedelta(days=days):
+                    for user_id, (points, wins) in bucket.items():
+                        running = totals.get(user_id)
+                        if running is None:
+                            continue
+                        running[0] -= points
+                        running[1] -= wins
+                        if running[0] <= 0 and running[1] <= 0:
+                            del totals[user_id]
+        cutoff = today - timedelta(days=self._retained_days)
+        for day in [d for d in self._buckets if d <= cutoff]:
+            del self._buckets[day]
+            self._debates.pop(day, None)
+
+    def add(self, user_id: str, debate_id: Optional[str], points: int, won: bool, when: Optional[datetime] = None) -> None:
+        """Count one debate that ended at `when` (default now); a debate ID already counted is ignored"""
+        with self._lock:
+            self._add(user_id, debate_id, points, won, when or datetime.utcnow())
+
+    def _add(self, user_id: str, debate_id: Optional[str], points: int, won: bool, when: datetime) -> None:
+        """add() with the lock held"""
+        day = when.date()
+        self._advance(max(datetime.utcnow().date(), self._today or day))
+        if not self._in_window(day, self._retained_days):
+            return
+        if debate_id is not None:
+            seen = self._debates.setdefault(day, set())
+            if debate_id in seen:
+                return
+            seen.add(debate_id)
+        bucket = self._buckets.setdefault(day, {}).setdefault(user_id, [0, 0])
+        bucket[0] += points
+        bucket[1] += int(won)
+        for name, days in self.windows.items():
+            if self._in_window(day, days):
+                running = self._totals[name].setdefault(user_id, [0, 0])
+                running[0] += points
+                running[1] += int(won)
+
+    def top(self, window: str, limit: int) -> List[Tuple[str, int, int]]:
+        """(user_id, points, wins) of the window's top `limit` users by points"""
+        if window not in self.windows:
+            raise ValueError(f"Unknown window: {window}")
+        with self._lock:
+            self._advance(datetime.utcnow().date())
+            items = list(self._totals[window].items())
+        best = heapq.nlargest(limit, items, key=lambda item: (item[1][0], item[1][1]))
+        return [(user_id, points, wins) for user_id, (points, wins) in best]
+
+    def load(self, outcomes: Iterable[dict], calculate_points: Callable[..., int]) -> int:
+        """Rebuild from archived debate outcomes once; returns how many were in range.
+
+        The outcomes are read first and applied in one step under the lock,
+        so top() never sees a partial load; a load that fails is retried on
+        the next call.
+        """
+        if self._loaded:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(days=self._retained_days)
+        rows = []
+        for o in outcomes:
+            ended_at = datetime.fromisoformat(o["ended_at"])
+            if ended_at <= cutoff:
+                continue
+            won = o["user_score"] > o["ai_score"]
+            points = calculate_points(won, o["rounds"], o["evidence"], o["fallacies"])
+            rows.append((o["user_id"], o["id"], points, won, ended_at))
+        with self._lock:
+            if self._loaded:
+                return 0
+            for row in rows:
+                self._add(*row)
+            self._loaded = True
+        logger.info("Loaded windowed leaderboards", extra={"debates": len(rows)})
+        return len(rows)
+
+
+# Global instance
+windowed_leaderboard = WindowedLeaderboard()
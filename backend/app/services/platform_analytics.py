@@ -0,0 +1,284 @@
+"""Platform-wide debate analytics kept as running totals.
+
+Every round and every ended debate adds to counters and fixed-bucket
+histograms held in numpy arrays. Modes and fallacy types get an array slot
+the first time they appear. Topics are free text, so only the
+ANALYTICS_TRACKED_TOPICS most frequent are kept, in a Space-Saving sketch:
+a new topic replaces the least counted one and inherits its count, which
+bounds memory while keeping the popular topics' counts (over-estimated by
+at most that inherited count). The analytics endpoint therefore reads
+totals, and its cost grows with neither the number of debates nor topics.
+
+`load` rebuilds the totals in one vectorized pass, once at startup. Its
+inputs are the archive index summaries and the debates currently in
+memory; a debate that was restored from the archive is counted once, from
+its in-memory copy.
+"""
+import heapq
+import logging
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.models.debate import Debate, DebateRound
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the ended-debate duration buckets; the last bucket is open
+DURATION_BUCKETS = (60, 180, 300, 600, 1200, 1800, 3600)
+# Ended debates with this many rounds or more share the last bucket
+ROUNDS_BUCKETS = 21
+
+# Per-mode columns
+STARTED, ENDED, WINS, CONCEDED, USER_SCORE, AI_SCORE, ROUNDS, DURATION = range(8)
+MODE_COLUMNS = 8
+
+
+def topic_label(topic: str) -> str:
+    """Case- and whitespace-insensitive key for counting topics"""
+    return " ".join(topic.split()).lower()
+
+
+def fallacy_name(fallacy: Any) -> str:
+    return getattr(fallacy.type, "value", fallacy.type)
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    """Archived summaries hold ISO strings, in-memory ones datetimes"""
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class _Slots:
+    """Maps names to rows of a numpy array that grows as new names appear"""
+
+    def __init__(self, columns: Optional[int] = None, dtype=np.int64):
+        self.index: Dict[str, int] = {}
+        self._shape = () if columns is None else (columns,)
+        self.values = np.zeros((8,) + self._shape, dtype=dtype)
+
+    def slot(self, name: str) -> int:
+        i = self.index.get(name)
+        if i is None:
+            i = self.index[name] = len(self.index)
+            if i == len(self.values):
+                grown = np.zeros((2 * len(self.values),) + self._shape, dtype=self.values.dtype)
+                grown[:i] = self.values
+                self.values = grown
+        return i
+
+    def used(self) -> np.ndarray:
+        return self.values[:len(self.index)]
+
+
+class _TopicCounts:
+    """Space-Saving heavy hitters: at most `capacity` topics, the least counted replaced by newcomers"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(capacity, 1)
+        self.index: Dict[str, int] = {}
+        self.keys: List[str] = []
+        self.names: List[str] = []
+        self.counts = np.zeros(self.capacity, dtype=np.int64)
+
+    def add(self, key: str, name: str, count: int = 1) -> None:
+        i = self.index.get(key)
+        if i is None:
+            if len(self.keys) < self.capacity:
+                i = len(self.keys)
+                self.keys.append(key)
+                self.names.append(name)
+            else:
+                # The newcomer keeps the evicted count as its possible over-count
+                i = int(np.argmin(self.counts))
+                del self.index[self.keys[i]]
+                self.keys[i], self.names[i] = key, name
+            self.index[key] = i
+        self.counts[i] += count
+
+    def top(self, limit: int) -> List[Tuple[str, int]]:
+        counts = self.counts[:len(self.keys)]
+        best = heapq.nlargest(limit, range(len(counts)), key=counts.__getitem__)
+        return [(self.names[i], int(counts[i])) for i in best]
+
+
+class PlatformAnalytics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self._loaded = False
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+    def _reset(self) -> None:
+        self._topics = _TopicCounts(settings.ANALYTICS_TRACKED_TOPICS)
+        self._modes = _Slots(MODE_COLUMNS, dtype=np.float64)
+        self._fallacies = _Slots()
+        self._durations = np.zeros(len(DURATION_BUCKETS) + 1, dtype=np.int64)
+        self._rounds = np.zeros(ROUNDS_BUCKETS, dtype=np.int64)
+        self._rounds_played = 0
+
+    def record_round(self, debate: Debate, debate_round: DebateRound) -> None:
+        """Count one played round (the first also counts the debate and its topic)"""
+        with self._lock:
+            if debate_round.number == 1:
+                self._topics.add(topic_label(debate.topic), debate.topic.strip())
+                self._modes.values[self._modes.slot(debate.mode), STARTED] += 1
+            self._rounds_played += 1
+            for fallacy in debate_round.user_fallacies:
+                self._fallacies.values[self._fallacies.slot(fallacy_name(fallacy))] += 1
+            self._snapshot = None
+
+    def record_end(self, debate: Debate) -> None:
+        """Count a debate's outcome, length and duration once it has ended"""
+        rounds = len(debate.rounds)
+        duration = (debate.ended_at - debate.started_at).total_seconds()
+        with self._lock:
+            row = self._modes.values[self._modes.slot(debate.mode)]
+            row[ENDED] += 1
+            # Same rule as the stats update: a draw counts as a loss
+            row[WINS] += debate.user_score > debate.ai_score
+            row[CONCEDED] += debate.user_conceded
+            row[USER_SCORE] += debate.user_score
+            row[AI_SCORE] += debate.ai_score
+            row[ROUNDS] += rounds
+            row[DURATION] += duration
+            self._rounds[min(rounds, ROUNDS_BUCKETS - 1)] += 1
+            self._durations[bisect_left(DURATION_BUCKETS, duration)] += 1
+            self._snapshot = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, summaries: Iterable[Dict[str, Any]], resident: Iterable[Debate] = ()) -> int:
+        """Rebuild every total from archived summaries plus in-memory debates (first call only)"""
+        if self._loaded:
+            return 0
+        self._loaded = True
+        return self.rebuild(summaries, resident)
+
+    def rebuild(self, summaries: Iterable[Dict[str, Any]], resident: Iterable[Debate] = ()) -> int:
+        """Replace every total with one computed from these debates; returns how many were counted"""
+        resident = {d.id: d for d in resident}
+        rows = [s for s in summaries if s["id"] not in resident]
+        rows.extend({"id": d.id, **d.summary()} for d in resident.values())
+
+        topics, modes, fallacies = _Slots(), _Slots(MODE_COLUMNS, dtype=np.float64), _Slots()
+        topic_names: Dict[str, str] = {}
+        columns: Dict[str, List[Any]] = {name: [] for name in (
+            "topic", "mode", "ended", "user_score", "ai_score", "conceded", "rounds", "duration",
+        )}
+        fallacy_codes: List[int] = []
+        fallacy_counts: List[int] = []
+        for s in rows:
+            key = topic_label(s["topic"])
+            topic_names.setdefault(key, s["topic"].strip())
+            columns["topic"].append(topics.slot(key))
+            columns["mode"].append(modes.slot(s["mode"]))
+            started_at, ended_at = _as_datetime(s["started_at"]), _as_datetime(s.get("ended_at"))
+            columns["ended"].append(ended_at is not None)
+            columns["duration"].append((ended_at - started_at).total_seconds() if ended_at else 0.0)
+            columns["user_score"].append(s["user_score"])
+            columns["ai_score"].append(s["ai_score"])
+            columns["conceded"].append(bool(s.get("conceded")))
+            columns["rounds"].append(s["rounds"])
+            for name, count in s["fallacy_types"].items():
+                fallacy_codes.append(fallacies.slot(name))
+                fallacy_counts.append(count)
+
+        topic = np.array(columns["topic"], dtype=np.int64)
+        mode = np.array(columns["mode"], dtype=np.int64)
+        ended = np.array(columns["ended"], dtype=bool)
+        user_score = np.array(columns["user_score"], dtype=np.float64)
+        ai_score = np.array(columns["ai_score"], dtype=np.float64)
+        rounds = np.array(columns["rounds"], dtype=np.int64)
+        duration = np.array(columns["duration"], dtype=np.float64)
+
+        n_modes = len(modes.index)
+        mode_values = np.zeros((max(n_modes, 8), MODE_COLUMNS), dtype=np.float64)
+        per_mode = {
+            STARTED: np.ones(len(rows)),
+            ENDED: ended,
+            WINS: ended & (user_score > ai_score),
+            CONCEDED: ended & np.array(columns["conceded"], dtype=bool),
+            USER_SCORE: np.where(ended, user_score, 0),
+            AI_SCORE: np.where(ended, ai_score, 0),
+            ROUNDS: np.where(ended, rounds, 0),
+            DURATION: duration,
+        }
+        for column, weights in per_mode.items():
+            mode_values[:n_modes, column] = np.bincount(mode, weights=weights, minlength=n_modes)
+        modes.values = mode_values
+        topic_counts = np.bincount(topic, minlength=len(topics.index))
+        top_topics = _TopicCounts(settings.ANALYTICS_TRACKED_TOPICS)
+        keys = list(topics.index)
+        # Keep the most debated topics, exactly counted
+        for i in np.argsort(-topic_counts, kind="stable")[:top_topics.capacity]:
+            top_topics.add(keys[i], topic_names[keys[i]], int(topic_counts[i]))
+        fallacies.values = np.bincount(
+            np.array(fallacy_codes, dtype=np.int64), weights=np.array(fallacy_counts, dtype=np.float64),
+            minlength=max(len(fallacies.index), 8)
+        ).astype(np.int64)
+
+        with self._lock:
+            self._topics, self._modes, self._fallacies = top_topics, modes, fallacies
+            self._rounds = np.bincount(np.minimum(rounds[ended], ROUNDS_BUCKETS - 1), minlength=ROUNDS_BUCKETS)
+            self._durations = np.bincount(
+                np.searchsorted(DURATION_BUCKETS, duration[ended], side="left"), minlength=len(DURATION_BUCKETS) + 1
+            )
+            self._rounds_played = int(rounds.sum())
+            self._snapshot = None
+        logger.info("Rebuilt platform analytics", extra={"debates": len(rows)})
+        return len(rows)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current totals, recomputed only after something was recorded"""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._build_snapshot()
+            return self._snapshot
+
+    def _build_snapshot(self) -> Dict[str, Any]:
+        """Derive rates and averages from the totals (lock held)"""
+        def share(part: float, whole: float) -> Optional[float]:
+            return round(float(part / whole), 4) if whole else None
+
+        modes = self._modes.used()
+        totals = modes.sum(axis=0) if len(modes) else np.zeros(MODE_COLUMNS)
+
+        def outcome(row: np.ndarray) -> Dict[str, Any]:
+            ended = row[ENDED]
+            return {
+                "started": int(row[STARTED]),
+                "ended": int(ended),
+                "user_win_rate": share(row[WINS], ended),
+                "concession_rate": share(row[CONCEDED], ended),
+                "avg_user_score": share(row[USER_SCORE], ended),
+                "avg_ai_score": share(row[AI_SCORE], ended),
+                "avg_rounds": share(row[ROUNDS], ended),
+                "avg_duration_seconds": share(row[DURATION], ended),
+            }
+
+        fallacy_counts = self._fallacies.used()
+        bounds: List[Tuple[str, int]] = [(str(b), i) for i, b in enumerate(DURATION_BUCKETS)] + [("+Inf", len(DURATION_BUCKETS))]
+        return {
+            "debates": {**outcome(totals), "rounds_played": self._rounds_played},
+            "modes": {name: outcome(modes[i]) for name, i in self._modes.index.items()},
+            "topics": [
+                {"topic": name, "debates": count} for name, count in self._topics.top(settings.ANALYTICS_TOP_TOPICS)
+            ],
+            "fallacies": dict(sorted(
+                ((name, int(fallacy_counts[i])) for name, i in self._fallacies.index.items()),
+                key=lambda item: -item[1]
+            )),
+            "rounds_histogram": {
+                (f"{i}+" if i == ROUNDS_BUCKETS - 1 else str(i)): int(count)
+                for i, count in enumerate(self._rounds) if count
+            },
+            "duration_histogram_seconds": {label: int(self._durations[i]) for label, i in bounds},
+        }
+
+
+# Global instance
+platform_analytics = PlatformAnalytics()
@@ -0,0 +1,70 @@
+"""Shared user ID -> username cache in front of `user_profiles`.
+
+Entries expire after PROFILE_CACHE_TTL_SECONDS so a change made outside
+this process is picked up eventually; writes made here update or
+invalidate the entry directly. Least recently used entries are dropped
+past PROFILE_CACHE_MAX_SIZE.
+"""
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict, Iterable, Optional, Tuple
+from app.config.supabase import get_supabase_admin, run_query
+from app.core.config import settings
+from app.core import metrics
+
+
+class ProfileCache:
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, user_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] < monotonic():
+                self._entries.pop(user_id, None)
+                metrics.record_cache("profiles", hit=False)
+                return None
+            self._entries.move_to_end(user_id)
+        metrics.record_cache("profiles", hit=True)
+        return entry[0]
+
+    def set(self, user_id: str, username: str) -> None:
+        with self._lock:
+            self._entries[user_id] = (username, monotonic() + settings.PROFILE_CACHE_TTL_SECONDS)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.PROFILE_CACHE_MAX_SIZE:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def get_username(self, user_id: str) -> Optional[str]:
+        """Username for one user, or None if they have no profile"""
+        return self.get_usernames([user_id]).get(user_id)
+
+    def get_usernames(self, user_ids: Iterable[str]) -> Dict[str, str]:
+        """Usernames for these users, fetching every miss in one query"""
+        found: Dict[str, str] = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            username = self._get(user_id)
+            if username is None:
+                missing.append(user_id)
+            else:
+                found[user_id] = username
+        if missing:
+            response = run_query(
+                get_supabase_admin().table('user_profiles').select('id, username').in_('id', missing),
+                'user_profiles', 'select'
+            )
+            for row in response.data:
+                self.set(row['id'], row['username'])
+                found[row['id']] = row['username']
+        return found
+
+
+# Global instance
+profile_cache = ProfileCache()
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+import os
+import random
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.core import metrics
+from app.core.config import settings
+from app.core.text import content_words, coverage
+from app.models.debate import intern_evidence
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_CATALOG = Path(__file__).resolve().parent.parent / "data" / "topic_catalog.json"
+STANCES = ("for", "against")
+MODES = ("normal", "roast")
+
+
+def normalize_stance(stance: str) -> Optional[str]:
+    """Map the stance detector's free-form label onto 'for'/'against'"""
+    stance = (stance or "").lower()
+    if "against" in stance:
+        return "against"
+    if "for" in stance:
+        return "for"
+    return None
+
+
+def topic_key(topic: str) -> frozenset:
+    """Order- and stopword-insensitive key so small rewordings still match"""
+    return frozenset(content_words(topic))
+
+
+class TopicCatalog:
+    """Popular topics with precomputed evidence and opening counter-arguments.
+
+    The catalog (topics, aliases and a canonical argument per stance) ships
+    with the app; the openings file is produced by the warm-up job
+    (`python -m app.jobs.warm_topics`) and loaded on first use.
+    """
+
+    def __init__(self):
+        self._topics: Optional[Dict[frozenset, Dict[str, Any]]] = None
+        self._openings: Optional[Dict[str, Any]] = None
+
+    def entries(self) -> List[Dict[str, Any]]:
+        path = settings.TOPIC_CATALOG_PATH or BUNDLED_CATALOG
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def match(self, topic: str) -> Optional[Dict[str, Any]]:
+        if self._topics is None:
+            self._topics = {}
+            for entry in self.entries():
+                for name in [entry["topic"], *entry.get("aliases", [])]:
+                    self._topics[topic_key(name)] = entry
+        return self._topics.get(topic_key(topic))
+
+    def _load_openings(self) -> Dict[str, Any]:
+        if self._openings is None:
+            try:
+                with open(settings.TOPIC_OPENINGS_PATH, encoding="utf-8") as f:
+                    self._openings = json.load(f).get("topics", {})
+                for stances in self._openings.values():
+                    for warmed in stances.values():
+                        warmed["evidence"] = [intern_evidence(e) for e in warmed.get("evidence", [])]
+            except FileNotFoundError:
+                logger.info("No topic openings file at %s; catalog disabled until warmed", settings.TOPIC_OPENINGS_PATH)
+                self._openings = {}
+        return self._openings
+
+    def reload(self) -> None:
+        self._topics = None
+        self._openings = None
+
+    def opening(self, topic: str, stance: str, mode: str) -> Optional[Dict[str, Any]]:
+        """A precomputed opening against `stance` for this topic, if one was warmed"""
+        if not settings.TOPIC_CATALOG_ENABLED:
+            return None
+        entry = self.match(topic)
+        user_stance = normalize_stance(stance)
+        warmed = self._load_openings().get(entry["topic"], {}).get(user_stance or "") if entry else None
+        variants = warmed.get(mode) if warmed else None
+        metrics.record_cache("topic_catalog", hit=bool(variants))
+        if not variants:
+            return None
+        return {
+            "counter_argument": random.choice(variants),
+            "evidence": warmed.get("evidence", []),
+            "stance_text": entry["stances"][user_stance],
+            "topic_terms": topic_key(entry["topic"]),
+        }
+
+    def needs_personalizing(self, opening: Dict[str, Any], user_argument: str) -> bool:
+        """True when the user's argument strays too far from the canonical stance"""
+        # Topic words appear on both sides and say nothing about the stance
+        user_terms = frozenset(content_words(user_argument)) - opening["topic_terms"]
+        canonical_terms = frozenset(content_words(opening["stance_text"]))
+        if not user_terms:
+            return False
+        return coverage(user_terms, canonical_terms) < settings.TOPIC_PERSONALIZE_THRESHOLD
+
+    async def warm(self, debate_service, variants: int, concurrency: int, topics: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Precompute evidence and opening variants for every topic/stance/mode"""
+        semaphore = asyncio.Semaphore(concurrency)
+        selected = [e for e in self.entries() if not topics or e["topic"] in topics]
+
+        async def warm_stance(entry: Dict[str, Any], stance: str) -> Dict[str, Any]:
+            topic = entry["topic"]
+            counter_stance = "against" if stance == "for" else "for"
+            async with semaphore:
+                evidence_data = await debate_service.evidence_retriever.execute({
+                    "topic": topic,
+                    "counter_stance": f"{counter_stance} {topic}",
+                    "stance": counter_stance,
+                    "query": entry["stances"][counter_stance]
+                })
+            evidence = evidence_data.get("evidence", [])
+
+            async def generate(mode: str) -> str:
+                async with semaphore:
+                    argument_data = await debate_service.argument_generator.execute({
+                        "topic": topic,
+                        "user_stance": stance,
+                        "user_argument": entry["stances"][stance],
+                        "evidence": evidence,
+                        "mode": mode,
+                        "round_number": 1,
+                        "debate_history": []
+                    })
+                return argument_data.get("counter_argument")
+
+            warmed: Dict[str, Any] = {"evidence": evidence}
+            for mode in MODES:
+                warmed[mode] = await asyncio.gather(*(generate(mode) for _ in range(variants)))
+            logger.info("Warmed topic opening", extra={"topic": topic, "stance": stance})
+            return warmed
+
+        results = await asyncio.gather(*(
+            warm_stance(entry, stance) for entry in selected for stance in STANCES
+        ))
+
+        openings = dict(self._load_openings())
+        pairs = iter(results)
+        for entry in selected:
+            openings[entry["topic"]] = {stance: next(pairs) for stance in STANCES}
+        return openings
+
+    def save_openings(self, openings: Dict[str, Any]) -> None:
+        path = settings.TOPIC_OPENINGS_PATH
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"generated_at": datetime.utcnow().isoformat(), "topics": openings},
+                f, ensure_ascii=False, default=lambda model: model.model_dump()
+            )
+        os.replace(tmp_path, path)
+        self._openings = openings
+
+
+# Global instance
+topic_catalog = TopicCatalog()